@@ -26,6 +26,7 @@ st.markdown(
     1. **Company Overview**:
         - Manager View: Provides general __behavioral__ metrics.
         - Strategic View: Displays __weekly__ __growth__ indicators.
+        - Trends View: Follows __moving__ order counts, delivery times and week-over-week growth.
         - Geographical View: Offers insights based on __geolocation__.
         
     2. **Delivery Drivers View**:
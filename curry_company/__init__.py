@@ -0,0 +1,11 @@
+"""Data layer and headless view computations of the Curry Company dashboard pages."""
+from curry_company.cleaning import clean_code
+from curry_company.cube import filter_cube, rollup
+from curry_company.filters import FilterSpec, dataset_dates, filter_key, select, view_key
+from curry_company.loader import (DATASET_PATH, dataset_version, load_cube, load_dataset, load_driver_tables,
+                                  load_sketches)
+from curry_company.reports import VIEWS, compute_report
+
+__all__ = ['DATASET_PATH', 'VIEWS', 'FilterSpec', 'clean_code', 'compute_report', 'dataset_dates', 'dataset_version',
+           'filter_cube', 'filter_key', 'load_cube', 'load_dataset', 'load_driver_tables', 'load_sketches', 'rollup',
+           'select', 'view_key']
@@ -0,0 +1,38 @@
+# Libraries:
+from curry_company.cube import combine_cells, rollup
+
+
+def aggregate(cube, metrics):
+    """
+        Computes several rollups of the same cube with a single pass over its cells.
+
+        The cells are first combined over the union of every requested grouping, and each metric is then rolled up
+        from that much smaller cube. Metrics sharing the same grouping and measure are computed once.
+
+        Parameters:
+            cube (DataFrame): A cube built by build_cube(), usually filtered with filter_cube().
+            metrics (dict): Metric name -> (by, measure), with the same meaning as in rollup().
+        Returns:
+            dict: Metric name -> the rollup() result (count, mean, std, min and max of the measure).
+    """
+    keys = []
+    for by, measure in metrics.values():
+        for key in _as_list(by):
+            if key not in keys:
+                keys.append(key)
+    shared = combine_cells(cube, keys) if keys else cube
+
+    results = {}
+    computed = {}
+    for name, (by, measure) in metrics.items():
+        spec = (tuple(_as_list(by)), measure)
+        if spec not in computed:
+            computed[spec] = rollup(shared, by, measure)
+        results[name] = computed[spec]
+    return results
+
+
+def _as_list(by):
+    if by is None:
+        return []
+    return [by] if isinstance(by, str) else list(by)
@@ -0,0 +1,196 @@
+# Libraries:
+import argparse
+import datetime
+import os
+import platform
+import time
+import tracemalloc
+
+import pandas as pd
+
+from curry_company import company, drivers, restaurants
+from curry_company.bitmaps import BitmapIndex
+from curry_company.cleaning import clean_code, index_by_date
+from curry_company.cube import build_cube, filter_cube
+from curry_company.driver_tables import build_driver_tables, driver_cells, drivers_per_week
+from curry_company.filters import filter_orders
+from curry_company.geo import delivery_distance
+from curry_company.maps import density_grid
+from curry_company.sketches import build_sketches, filter_sketches
+from curry_company.synthetic import TRAFFIC, WEATHER, generate_orders
+from curry_company.tables import paginate
+from curry_company.trends import rolling_trends
+
+RESULTS_PATH = 'benchmarks/results.csv'
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# Sidebar state of the benchmarked filters: the defaults of the pages, i.e. every order is selected.
+DATE_CUTOFF = datetime.datetime(2022, 4, 13)
+TRAFFIC_OPTIONS = [traffic.strip() for traffic in TRAFFIC]
+WEATHER_CONDITIONS = list(WEATHER)
+
+
+# Benchmarked steps, in the order a cold page render runs them: (name, page, function of the prepared data). 'load'
+# steps run once per process, the others on every rerun of the page.
+STEPS = [
+    ('clean_code', 'load', lambda data: clean_code(data['raw'])),
+    ('delivery_distance', 'load', lambda data: delivery_distance(data['orders'])),
+    ('build_cube', 'load', lambda data: build_cube(data['orders'])),
+    ('index_by_date', 'load', lambda data: index_by_date(data['raw_orders'])),
+    ('bitmap_index', 'load', lambda data: BitmapIndex(data['orders'])),
+    ('build_sketches', 'load', lambda data: build_sketches(data['orders'])),
+    ('build_driver_tables', 'load', lambda data: build_driver_tables(data['orders'])),
+    ('filter_orders', 'all', lambda data: filter_orders(data['orders'], DATE_CUTOFF, TRAFFIC_OPTIONS,
+                                                        WEATHER_CONDITIONS, bitmaps=data['bitmaps'])),
+    ('filter_cube', 'all', lambda data: filter_cube(data['cube'], DATE_CUTOFF, TRAFFIC_OPTIONS, WEATHER_CONDITIONS,
+                                                    bitmaps=data['cube_bitmaps'])),
+    ('filter_sketches', 'all', lambda data: filter_sketches(data['sketches'], DATE_CUTOFF, TRAFFIC_OPTIONS,
+                                                            WEATHER_CONDITIONS)),
+    ('filter_weekly_drivers', 'company', lambda data: drivers_per_week(data['driver_tables'], DATE_CUTOFF,
+                                                                       TRAFFIC_OPTIONS, WEATHER_CONDITIONS)),
+    ('orders_by_week_person', 'company',
+     lambda data: company.orders_by_week_person(data['weekly_drivers'], data['cube'])),
+    # Same chart in approximate mode, with the distinct drivers estimated from the sketches.
+    ('orders_by_week_person_approximate', 'company',
+     lambda data: company.orders_by_week_person(None, data['cube'], data['sketches'])),
+    ('delivery_time_percentiles', 'company', lambda data: company.delivery_time_percentiles(data['sketches'])),
+    ('density_grid', 'company', lambda data: density_grid(data['orders'])),
+    ('rolling_trends', 'company', lambda data: rolling_trends(data['cube'])),
+    ('filter_driver_cells', 'drivers', lambda data: driver_cells(data['driver_tables'], DATE_CUTOFF, TRAFFIC_OPTIONS,
+                                                                 WEATHER_CONDITIONS)),
+    ('personnel_ratings', 'drivers', lambda data: drivers.personnel_ratings(data['driver_cells'])),
+    ('paginate', 'drivers', lambda data: paginate(data['ratings'], page=1, page_size=20, sort_by='Average Rating',
+                                                  ascending=False)),
+    ('top_delivers', 'drivers', lambda data: drivers.top_delivers(data['driver_cells'])),
+    ('view_metrics', 'restaurants', lambda data: restaurants.view_metrics(data['cube'])),
+]
+
+
+def measure(func, repeat=3):
+    """
+        Times a function and measures the peak memory it allocates.
+
+        Parameters:
+            func (callable): Function called without arguments.
+            repeat (int): Number of timed calls, the fastest one is kept.
+        Returns:
+            tuple: (seconds, peak_bytes). Peak memory is measured on one extra call with tracemalloc, which also
+            tracks NumPy and pandas buffers, so tracing overhead never inflates the timings.
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def prepare(rows, seed=0):
+    # Synthetic raw orders and everything the steps start from: cleaned orders (unsorted, and sorted and indexed by
+    # date as curry_company.loader keeps them), their cube, sketches and driver tables, the bitmap indexes of the orders
+    # and the cube, the driver cells and weekly drivers of every order, and driver ratings.
+    raw = generate_orders(rows, seed=seed)
+    raw_orders = clean_code(raw)
+    orders = index_by_date(raw_orders)
+    cube = build_cube(orders)
+    tables = build_driver_tables(orders)
+    cells = driver_cells(tables, DATE_CUTOFF, TRAFFIC_OPTIONS, WEATHER_CONDITIONS)
+    return {'raw': raw, 'raw_orders': raw_orders, 'orders': orders, 'cube': cube, 'sketches': build_sketches(orders),
+            'bitmaps': BitmapIndex(orders), 'cube_bitmaps': BitmapIndex(cube), 'driver_tables': tables,
+            'driver_cells': cells,
+            'weekly_drivers': drivers_per_week(tables, DATE_CUTOFF, TRAFFIC_OPTIONS, WEATHER_CONDITIONS),
+            'ratings': drivers.personnel_ratings(cells)}
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=3, seed=0, steps=None):
+    """
+        Runs every benchmarked step headlessly over synthetic datasets of several sizes.
+
+        Parameters:
+            sizes (list): Numbers of raw orders to generate.
+            repeat (int): Timed calls per step.
+            seed (int): Seed of the synthetic datasets.
+            steps (list): Names of the steps to run, or None for all of STEPS.
+        Returns:
+            DataFrame: One row per size and step, with the run timestamp, environment, seconds, throughput in raw
+            orders per second and peak memory in MB.
+    """
+    run = datetime.datetime.now().isoformat(timespec='seconds')
+    results = []
+    for rows in sizes:
+        data = prepare(rows, seed=seed)
+        for name, page, func in STEPS:
+            if steps is not None and name not in steps:
+                continue
+            seconds, peak = measure(lambda: func(data), repeat=repeat)
+            results.append({'run': run, 'python': platform.python_version(), 'pandas': pd.__version__, 'rows': rows,
+                            'step': name, 'page': page, 'seconds': round(seconds, 6),
+                            'rows_per_second': round(rows / seconds) if seconds else None,
+                            'peak_mb': round(peak / 2 ** 20, 2)})
+    return pd.DataFrame(results)
+
+
+def save_results(results, path=RESULTS_PATH):
+    # Results are appended, so the file keeps the history of every run for regression comparison.
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    results.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+
+def compare_results(results, path=RESULTS_PATH):
+    """
+        Compares a run with the latest run stored in a results file.
+
+        Parameters:
+            results (DataFrame): Output of run_benchmarks().
+            path (str): Results file written by save_results().
+        Returns:
+            DataFrame: The results with the previous 'seconds' and 'peak_mb' of each size and step, and the 'ratio'
+            of the new time over the previous one (above 1 is a slowdown). Empty previous columns when the file does
+            not exist or has no matching step.
+    """
+    cols = ['rows', 'step', 'seconds', 'peak_mb']
+    if os.path.exists(path):
+        previous = pd.read_csv(path)
+        previous = previous.loc[previous['run'] == previous['run'].max(), cols]
+    else:
+        previous = pd.DataFrame(columns=cols)
+    df_aux = results.merge(previous, on=['rows', 'step'], how='left', suffixes=('', '_previous'))
+    df_aux['ratio'] = (df_aux['seconds'] / df_aux['seconds_previous'].astype('float64')).round(2)
+    return df_aux
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks the dashboard data paths over synthetic datasets.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='numbers of orders to generate')
+    parser.add_argument('--repeat', type=int, default=3, help='timed calls per step, the fastest is kept')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic datasets')
+    parser.add_argument('--steps', nargs='+', choices=[name for name, _, _ in STEPS], help='steps to run (all)')
+    parser.add_argument('--output', default=RESULTS_PATH, help='results file, compared against and then appended to')
+    parser.add_argument('--no-save', action='store_true', help='compare only, do not append this run')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, repeat=args.repeat, seed=args.seed, steps=args.steps)
+    report = compare_results(results, args.output)
+    cols = ['rows', 'step', 'page', 'seconds', 'rows_per_second', 'peak_mb', 'seconds_previous', 'ratio']
+    print(report.loc[:, cols].to_string(index=False))
+    # Time of a page rerun at each size: the shared filters plus the page's own steps.
+    totals = results.loc[results['page'] != 'load', :].pivot_table(index='rows', columns='page', values='seconds',
+                                                                   aggfunc='sum')
+    if 'all' in totals:
+        totals = totals.drop(columns='all').add(totals['all'], axis=0)
+    print()
+    print(totals.round(4).to_string())
+    if not args.no_save:
+        save_results(results, args.output)
+
+
+if __name__ == '__main__':
+    # python -m curry_company.benchmark --sizes 10000 100000 1000000 10000000
+    main()
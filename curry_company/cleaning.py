@@ -0,0 +1,114 @@
+# Libraries:
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from curry_company.geo import delivery_distance
+
+# Raw columns where a missing value is written as the literal string 'NaN '. Rows with any of them missing are dropped.
+NULLABLE_COLUMNS = ['Delivery_person_Age', 'Road_traffic_density', 'City', 'Festival', 'multiple_deliveries']
+
+# Low-cardinality text columns, stripped of surrounding spaces and stored as categories.
+STRIPPED_CATEGORIES = ['Road_traffic_density', 'Type_of_order', 'Type_of_vehicle', 'City', 'Festival']
+
+# Declared dtypes of the cleaned dataset. Columns not listed here (order/pickup times) are kept as read. 'distance' is
+# derived at load time: the restaurant to delivery location distance in km. Ratings stay float64: in float32 values
+# like 4.9 are not exact and the 2-decimal averages shown on the pages drift.
+SCHEMA = {
+    'ID': 'object',
+    'Delivery_person_ID': 'category',
+    'Delivery_person_Age': 'int8',
+    'Delivery_person_Ratings': 'float64',
+    'Restaurant_latitude': 'float64',
+    'Restaurant_longitude': 'float64',
+    'Delivery_location_latitude': 'float64',
+    'Delivery_location_longitude': 'float64',
+    'Order_Date': 'datetime64[ns]',
+    'Weatherconditions': 'category',
+    'Road_traffic_density': 'category',
+    'Vehicle_condition': 'int8',
+    'Type_of_order': 'category',
+    'Type_of_vehicle': 'category',
+    'multiple_deliveries': 'int8',
+    'Festival': 'category',
+    'City': 'category',
+    'Time_taken(min)': 'int16',
+    'distance': 'float64',
+}
+
+
+def _map_distinct(series, func=None):
+    # Applies func once per distinct value instead of once per row and returns the result as a categorical with
+    # lexically sorted categories, so groupbys keep the same order as they had on plain strings.
+    codes, uniques = pd.factorize(series)
+    values = pd.Index(uniques) if func is None else pd.Index(uniques).map(func)
+    value_codes, categories = pd.factorize(values, sort=True)
+    codes = value_codes.take(codes, mode='clip')
+    codes[series.isna().to_numpy()] = -1
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=series.index, name=series.name)
+
+
+def clean_code(df1):
+    # Function to clean dataframe: removing "NaN", fixing data types, removing spaces within strings/text/object,
+    # formatting Data column, separating text from int column, remove 'condition' word
+    # Input: Dataframe and Output: Dataframe with the dtypes declared in SCHEMA
+
+    # A single mask over every nullable column, so the frame is copied only once.
+    selected_lines = (df1.loc[:, NULLABLE_COLUMNS] != 'NaN ').all(axis=1)
+    df1 = df1.loc[selected_lines, :].copy()
+
+    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
+    df1['ID'] = df1['ID'].str.strip()
+
+    for col in STRIPPED_CATEGORIES:
+        df1[col] = _map_distinct(df1[col], str.strip)
+    df1['Delivery_person_ID'] = _map_distinct(df1['Delivery_person_ID'])
+
+    # Cleaning Time_taken: '(min) 24' -> 24
+    df1['Time_taken(min)'] = _map_distinct(df1['Time_taken(min)'], lambda x: x.split('(min) ')[1])
+
+    # Cleaning Weatherconditions: 'conditions Sunny' -> 'Sunny'
+    df1['Weatherconditions'] = _map_distinct(df1['Weatherconditions'], lambda x: x.split('conditions ')[1])
+
+    df1['distance'] = delivery_distance(df1)
+
+    return df1.astype(SCHEMA)
+
+
+def append_frames(df1, df2):
+    # Appends two frames with the same columns, see concat_frames().
+    return concat_frames([df1, df2])
+
+
+def concat_frames(frames):
+    # Concatenates frames with the same columns while keeping categorical columns categorical: a plain pd.concat falls
+    # back to object when their categories differ. The result has a fresh RangeIndex.
+    data = {}
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            data[col] = union_categoricals([frame[col] for frame in frames], sort_categories=True)
+        else:
+            data[col] = pd.concat([frame[col] for frame in frames], ignore_index=True)
+    return pd.DataFrame(data)
+
+
+def sort_categories(df1):
+    # Reorders the categories of every categorical column lexically (as clean_code() creates them), e.g. after reading
+    # data written in chunks, whose categories come in order of first appearance.
+    for col in df1.columns:
+        categories = df1[col].cat.categories if isinstance(df1[col].dtype, pd.CategoricalDtype) else None
+        if categories is not None and not categories.is_monotonic_increasing:
+            df1[col] = df1[col].cat.set_categories(categories.sort_values())
+    return df1
+
+
+def index_by_date(df1):
+    # Sorts the orders by date (stable, so the orders of a day keep their order) and indexes them by it, so a date
+    # range is found by binary search on the index and selected as a slice (see curry_company.filters).
+    dates = df1['Order_Date'].to_numpy()
+    if len(dates) and not (dates[1:] >= dates[:-1]).all():
+        df1 = df1.take(np.argsort(dates, kind='stable'))
+    else:
+        df1 = df1.copy(deep=False)
+    df1.index = pd.DatetimeIndex(df1['Order_Date'].to_numpy())
+    return df1
@@ -0,0 +1,199 @@
+# Libraries:
+import pandas as pd
+import plotly.express as px
+
+from curry_company.cube import rollup, week_of_year
+from curry_company.figures import bucket_bars
+from curry_company.maps import MAP_MODES, build_map, render_map
+from curry_company.sketches import approximate, coordinate_medians, distinct_drivers, time_quantiles
+from curry_company.trends import rolling_trends
+
+# Order columns used by the Company view (its maps), the order counts come from the cube, the delivery time percentiles
+# from the sketches and the distinct drivers of each week from the weekly drivers (see curry_company.driver_tables). In
+# approximate mode (see curry_company.sketches) the distinct drivers and the central locations come from the sketches
+# too.
+COLUMNS = ['Order_Date', 'Weatherconditions', 'Road_traffic_density', 'City', 'Delivery_location_latitude',
+           'Delivery_location_longitude']
+
+# Inputs of the view, in the order its computations receive them (see curry_company.reports).
+INPUTS = ['orders', 'cube', 'sketches', 'weekly_drivers']
+
+
+def country_maps(df1, mode, sketches=None):
+    # Rendered map HTML of the orders in one of maps.MAP_MODES. With sketches, the central locations are their
+    # approximate medians.
+    centers = None
+    if sketches is not None and mode == 'Central locations':
+        centers = coordinate_medians(sketches, ['City', 'Road_traffic_density'])
+    return render_map(build_map(df1, mode, centers))
+
+
+def orders_per_week(cube):
+    # In my dataset I don't have the week of the year column, so I need to create using %U(Sunday as first day of the
+    # week, %W is monday the first day of the week). The cube is rolled up by day first, so only the distinct dates
+    # are converted.
+    df_aux = rollup(cube, 'Order_Date').reset_index()
+    df_aux['week_of_year'] = week_of_year(df_aux['Order_Date'])
+    df_aux = df_aux.groupby('week_of_year')['count'].sum().reset_index()
+    return df_aux
+
+
+def orders_by_week_person(drivers, cube, sketches=None):
+    # Orders volume by week of the year.
+    df_aux01 = orders_per_week(cube).rename(columns={'count': 'ID'})
+    if sketches is not None:
+        # Approximate distinct drivers, from the HyperLogLog registers of the week's sketch cells.
+        df_aux02 = distinct_drivers(sketches, week_of_year(sketches.cells['Order_Date']))
+    else:
+        # Distinct drivers are not additive, so they are counted per week (see curry_company.driver_tables).
+        df_aux02 = drivers
+    df_aux = pd.merge(df_aux01, df_aux02, how='inner')
+    df_aux['order_by_delivery_driver'] = (df_aux['ID'] / df_aux['Delivery_person_ID']).round(0)
+
+    fig = px.line(df_aux, x='week_of_year', y='order_by_delivery_driver')
+    fig.update_layout(
+        xaxis_title="Week of the Year",
+        yaxis_title="Order by Delivery Driver"
+    )
+    return fig
+
+
+def orders_by_week(cube):
+    # Number of orders per week of the year.
+    df_aux = orders_per_week(cube).rename(columns={'count': 'Number_of_Orders'})
+
+    # Line chart - using Plotly
+    fig = px.line(df_aux, x='week_of_year', y='Number_of_Orders')
+    fig.update_layout(
+        xaxis_title="Week of the Year",
+        yaxis_title="Number of Orders"
+    )
+    return fig
+
+
+def orders_by_city_traffic(cube):
+    # Comparison of order volumes by city and traffic type.
+    df_aux = (rollup(cube, ['City', 'Road_traffic_density'])
+              .reset_index()
+              .rename(columns={'count': 'Number_of_Orders'})
+              .astype({'City': str, 'Road_traffic_density': str}))
+    # Scatter plot
+    fig = px.scatter(df_aux, x='City', y='Road_traffic_density', size='Number_of_Orders', color='City')
+    fig.update_layout(
+        xaxis_title="City",
+        yaxis_title="Road Traffic Density"
+    )
+    return fig
+
+
+def orders_by_traffic(cube):
+    # Distribution of orders by type of traffic.
+    df_aux = (rollup(cube, 'Road_traffic_density')
+              .reset_index()
+              .rename(columns={'count': 'ID'}))
+    df_aux = df_aux.loc[df_aux['Road_traffic_density'] != 'NaN', :]
+    df_aux['%deliveries'] = (df_aux['ID'] / df_aux['ID'].sum()).round(2)
+
+    # Pie chart
+
+    fig = px.pie(df_aux, values='%deliveries', names='Road_traffic_density')
+
+    return fig
+
+
+def order_metric(cube):
+    # Distribution of orders in timeline.
+    df_aux = (rollup(cube, 'Order_Date')
+              .reset_index()
+              .rename(columns={'count': 'Number_of_Orders'}))
+    df_aux = bucket_bars(df_aux, 'Order_Date', 'Number_of_Orders', how='sum')
+    # Chart
+    fig = px.bar(df_aux, x='Order_Date', y='Number_of_Orders')
+    fig.update_layout(
+        xaxis_title="Order Date",
+        yaxis_title="Number of Orders"
+    )
+    return fig
+
+
+def delivery_time_percentiles(sketches):
+    # Median, 90th and 99th percentile of the delivery time per day, from the per-minute histograms of the sketches.
+    df_aux = time_quantiles(sketches, 'Order_Date', levels=(0.5, 0.9, 0.99))
+    fig = px.line(df_aux, x='Order_Date', y=['p50', 'p90', 'p99'])
+    fig.update_layout(
+        xaxis_title="Order Date",
+        yaxis_title="Delivery Time (min)",
+        legend_title="Percentile"
+    )
+    return fig
+
+
+def rolling_orders(cube):
+    # Moving number of orders over the last 7 and 28 days, to follow the trend through the daily seasonality.
+    df_aux = (rolling_trends(cube)
+              .loc[:, ['orders_7d', 'orders_28d']]
+              .rename(columns={'orders_7d': '7 days', 'orders_28d': '28 days'})
+              .reset_index())
+    fig = px.line(df_aux, x='Order_Date', y=['7 days', '28 days'])
+    fig.update_layout(
+        xaxis_title="Order Date",
+        yaxis_title="Number of Orders",
+        legend_title="Moving window"
+    )
+    return fig
+
+
+def rolling_delivery_time(cube):
+    # Moving mean and standard deviation of the delivery time over the last 7 and 28 days.
+    df_aux = (rolling_trends(cube)
+              .loc[:, ['mean_7d', 'mean_28d', 'std_7d', 'std_28d']]
+              .rename(columns={'mean_7d': 'Mean, 7 days', 'mean_28d': 'Mean, 28 days', 'std_7d': 'Std, 7 days',
+                               'std_28d': 'Std, 28 days'})
+              .reset_index())
+    fig = px.line(df_aux, x='Order_Date', y=['Mean, 7 days', 'Mean, 28 days', 'Std, 7 days', 'Std, 28 days'])
+    fig.update_layout(
+        xaxis_title="Order Date",
+        yaxis_title="Delivery Time (min)",
+        legend_title="Moving window"
+    )
+    return fig
+
+
+def week_over_week(cube):
+    # Orders of the last 7 days compared with the 7 days before, in %.
+    df_aux = rolling_trends(cube).loc[:, ['wow_growth']].reset_index()
+    df_aux = bucket_bars(df_aux, 'Order_Date', 'wow_growth', how='mean')
+    df_aux['wow_growth'] = (df_aux['wow_growth'] * 100).round(2)
+    fig = px.bar(df_aux, x='Order_Date', y='wow_growth')
+    fig.update_layout(
+        xaxis_title="Order Date",
+        yaxis_title="Week-over-Week Growth (%)"
+    )
+    return fig
+
+
+def report(df1, cube, sketches, drivers):
+    """
+        Every chart of the Company view.
+
+        Parameters:
+            df1 (DataFrame): Filtered orders with the COLUMNS columns.
+            cube (DataFrame): Filtered cube cells.
+            sketches (Sketches): Filtered sketch cells.
+            drivers (DataFrame): Distinct delivery drivers of each week of the year among the filtered orders.
+        Returns:
+            dict: Chart name -> Plotly figure, and 'map <mode>' -> rendered map HTML for each of MAP_MODES.
+    """
+    maps = {'map ' + mode: country_maps(df1, mode, approximate(sketches)) for mode in MAP_MODES}
+    return {
+        'order_metric': order_metric(cube),
+        'orders_by_traffic': orders_by_traffic(cube),
+        'orders_by_city_traffic': orders_by_city_traffic(cube),
+        'orders_by_week': orders_by_week(cube),
+        'orders_by_week_person': orders_by_week_person(drivers, cube, approximate(sketches)),
+        'delivery_time_percentiles': delivery_time_percentiles(sketches),
+        'rolling_orders': rolling_orders(cube),
+        'rolling_delivery_time': rolling_delivery_time(cube),
+        'week_over_week': week_over_week(cube),
+        **maps,
+    }
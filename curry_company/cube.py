@@ -0,0 +1,179 @@
+# Libraries:
+import numpy as np
+import pandas as pd
+
+from curry_company.cleaning import append_frames
+
+# Every filter and grouping key used by the pages. One cube cell holds all orders sharing these values.
+DIMENSIONS = ['Order_Date', 'City', 'Road_traffic_density', 'Weatherconditions', 'Festival', 'Type_of_order',
+              'Type_of_vehicle']
+
+# Numeric columns summarized in each cell by count of non-missing values, sum, sum of squares, min and max.
+MEASURES = ['Time_taken(min)', 'Delivery_person_Ratings', 'distance', 'Delivery_person_Age', 'Vehicle_condition']
+
+
+def build_cube(df1, dimensions=DIMENSIONS, measures=MEASURES):
+    """
+        Pre-aggregates the orders into one row per combination of the dimensions.
+
+        Parameters:
+            df1 (DataFrame): Cleaned orders, with every column of dimensions and measures.
+            dimensions (list): Grouping columns, DIMENSIONS for the cube.
+            measures (list): Numeric columns summarized in each cell.
+        Returns:
+            DataFrame: The dimensions columns, the number of orders 'count', and '<measure>_count', '<measure>_sum',
+            '<measure>_sumsq', '<measure>_min', '<measure>_max' for each of the measures, sorted by the dimensions.
+    """
+    frame = df1.loc[:, dimensions + measures]
+    aggregations = {'count': (measures[0], 'size')}
+    for col in measures:
+        # Sums are accumulated in float64, min and max keep the column's own dtype.
+        values = df1[col].to_numpy(dtype='float64')
+        frame = frame.assign(**{col + '_value': values, col + '_square': values ** 2})
+        aggregations[col + '_count'] = (col, 'count')
+        aggregations[col + '_sum'] = (col + '_value', 'sum')
+        aggregations[col + '_sumsq'] = (col + '_square', 'sum')
+        aggregations[col + '_min'] = (col, 'min')
+        aggregations[col + '_max'] = (col, 'max')
+
+    cube = frame.groupby(dimensions, observed=True, dropna=False).agg(**aggregations)
+    return cube.reset_index()
+
+
+def combine_cells(cube, by, dimensions=DIMENSIONS):
+    # Merges the cells sharing the same values of `by` into one cell: counts and sums are added, min and max kept.
+    # The result is again a cube (over the dimensions in `by`), so rollup() works on it.
+    cols = [col for col in cube.columns if col not in dimensions]
+    aggregations = {col: 'min' if col.endswith('_min') else 'max' if col.endswith('_max') else 'sum' for col in cols}
+    return cube.loc[:, by + cols].groupby(by, observed=True, dropna=False).agg(aggregations).reset_index()
+
+
+def merge_cubes(cube, other, dimensions=DIMENSIONS):
+    # Combines two cubes of the same dimensions, e.g. the current one and the cube of a new batch of orders. Work is
+    # proportional to the number of cells, not to the number of orders behind them.
+    return combine_cells(append_frames(cube, other.loc[:, cube.columns]), dimensions, dimensions)
+
+
+def date_slice(dates, date_cutoff, date_start=None):
+    # Positions of the dates in [date_start, date_cutoff) of sorted dates, found by binary search.
+    start = 0 if date_start is None else dates.searchsorted(date_start, side='left')
+    return slice(start, dates.searchsorted(date_cutoff, side='left'))
+
+
+def _selects_all(values, options):
+    # Whether every value of a column is selected (every category, and no missing values), in which case the column
+    # needs no mask.
+    return hasattr(values, 'cat') and set(values.cat.categories) <= set(options) and not values.hasnans
+
+
+def _match(df1, selection, rows=slice(None)):
+    # Same as BitmapIndex.match() by scanning the columns, for frames without a bitmap index.
+    selected_lines = None
+    for col, options in selection.items():
+        values = df1[col].iloc[rows]
+        if not _selects_all(values, options):
+            mask = values.isin(options).to_numpy()
+            selected_lines = mask if selected_lines is None else selected_lines & mask
+    return selected_lines
+
+
+def select_rows(df1, dates, date_cutoff, traffic_options, weather_conditions, date_start=None, bitmaps=None):
+    """
+        Rows of a frame matching the sidebar selection.
+
+        When the dates are sorted, the date range is a slice found by binary search, which selects no rows by copy.
+        Traffic and weather only add a mask when some of their values are left out, resolved from the bitmaps of the
+        frame when it has a curry_company.bitmaps.BitmapIndex. The selected rows are then gathered once.
+
+        Parameters:
+            df1 (DataFrame): Orders or cube cells with the 'Road_traffic_density' and 'Weatherconditions' columns.
+            dates (Index or Series): The order date of each row.
+            date_cutoff (Timestamp): First date left out.
+            traffic_options (iterable): Selected traffic densities.
+            weather_conditions (iterable): Selected weather conditions.
+            date_start (Timestamp): First date selected, or None for no lower bound.
+            bitmaps (BitmapIndex): Bitmap index of df1, or None to scan the columns.
+        Returns:
+            DataFrame: The selected rows.
+    """
+    selection = {'Road_traffic_density': traffic_options, 'Weatherconditions': weather_conditions}
+    if bitmaps is not None and bitmaps.rows != len(df1):
+        # An index of another version of the frame, e.g. built before a batch was ingested.
+        bitmaps = None
+    match = bitmaps.match if bitmaps is not None else lambda selection, rows=slice(None): _match(df1, selection, rows)
+    if dates.is_monotonic_increasing:
+        rows = date_slice(dates, date_cutoff, date_start)
+        selected_lines = match(selection, rows)
+        if selected_lines is None:
+            return df1.iloc[rows]
+        return df1.take(np.flatnonzero(selected_lines) + rows.start)
+    selected_lines = np.asarray(dates < date_cutoff)
+    if date_start is not None:
+        selected_lines &= np.asarray(dates >= date_start)
+    categories = match(selection)
+    if categories is not None:
+        selected_lines &= categories
+    return df1.loc[selected_lines, :]
+
+
+def filter_cube(cube, date_cutoff, traffic_options, weather_conditions, date_start=None, bitmaps=None):
+    # Same selection the pages apply to the orders, evaluated over cells instead of rows. Cubes come out of a group by
+    # with the date as the first key, so their dates are sorted.
+    return select_rows(cube, cube['Order_Date'], date_cutoff, traffic_options, weather_conditions, date_start, bitmaps)
+
+
+def _stats(count, total, squares, minimum, maximum):
+    # Mean and sample standard deviation (ddof=1, as pandas) recovered from the additive sums.
+    mean = total / count
+    variance = (squares - total * mean) / (count - 1)
+    std = np.sqrt(np.maximum(variance, 0))
+    return {'count': count, 'mean': mean, 'std': std, 'min': minimum, 'max': maximum}
+
+
+def rollup(cube, by=None, measure=None):
+    """
+        Rolls the cube up to coarser groups.
+
+        Parameters:
+            cube (DataFrame): A cube built by build_cube(), usually filtered with filter_cube().
+            by (str or list): Dimensions to group by, or None for the grand total.
+            measure (str): One of MEASURES, or None to return only the order count.
+        Returns:
+            DataFrame: Indexed by `by`, with columns count (non-missing values), mean, std, min and max of the
+            measure, or only the number of orders 'count' when measure is None. When `by` is None a Series with the
+            same labels is returned.
+    """
+    if measure is None:
+        cols = ['count']
+    else:
+        cols = [measure + suffix for suffix in ('_count', '_sum', '_sumsq', '_min', '_max')]
+
+    if by is None:
+        cells = cube.loc[:, cols]
+        if measure is None:
+            return pd.Series({'count': cells['count'].sum()})
+        count = cells[measure + '_count'].sum()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats = _stats(count, cells[measure + '_sum'].sum(), cells[measure + '_sumsq'].sum(),
+                           cells[measure + '_min'].min(), cells[measure + '_max'].max())
+        if count < 2:
+            stats['std'] = np.nan
+        # object dtype keeps min and max in the measure's own type (e.g. ages stay integers).
+        return pd.Series(stats, dtype='object')
+
+    grouped = cube.loc[:, cols + ([by] if isinstance(by, str) else list(by))].groupby(by, observed=True)
+    if measure is None:
+        return grouped[['count']].sum()
+    sums = grouped[[measure + '_count', measure + '_sum', measure + '_sumsq']].sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stats = _stats(sums[measure + '_count'], sums[measure + '_sum'], sums[measure + '_sumsq'],
+                       grouped[measure + '_min'].min(), grouped[measure + '_max'].max())
+    df_aux = pd.DataFrame(stats)
+    df_aux.loc[df_aux['count'] < 2, 'std'] = np.nan
+    return df_aux
+
+
+def week_of_year(dates):
+    # Week of the year as '%U' strings (Sunday as first day of the week), formatted once per distinct date.
+    codes, uniques = pd.factorize(dates)
+    return pd.Series(pd.Index(uniques).strftime('%U').take(codes), index=dates.index, name='week_of_year')
@@ -0,0 +1,148 @@
+# Libraries:
+import pandas as pd
+
+from curry_company.cube import build_cube, combine_cells, date_slice, merge_cubes, week_of_year
+
+# Driver tables: cubes (see curry_company.cube) of the orders per delivery driver of each city, and per week, city and
+# driver. They have as many cells as drivers (times weeks), whatever the number of orders.
+DRIVER_DIMENSIONS = ['City', 'Delivery_person_ID']
+WEEK_DIMENSIONS = ['Order_Date'] + DRIVER_DIMENSIONS
+DRIVER_MEASURES = ['Delivery_person_Ratings', 'Time_taken(min)']
+
+# Traffic densities and weather conditions the pages open with: all of them. The driver tables hold the orders of
+# this selection, values outside of it (e.g. the 'NaN' weather condition) are in no selection of the pages.
+DEFAULT_TRAFFIC = ['Low', 'Medium', 'High', 'Jam']
+DEFAULT_WEATHER = ['Cloudy', 'Fog', 'Sandstorms', 'Stormy', 'Sunny', 'Windy']
+
+# Order columns the driver tables are built from.
+COLUMNS = ['Order_Date', 'Road_traffic_density', 'Weatherconditions'] + DRIVER_DIMENSIONS + DRIVER_MEASURES
+
+
+class DriverTables:
+    """
+        Driver tables of the orders of DEFAULT_TRAFFIC and DEFAULT_WEATHER.
+
+        Parameters:
+            drivers (DataFrame): Cells per DRIVER_DIMENSIONS.
+            weeks (DataFrame): Cells per WEEK_DIMENSIONS, 'Order_Date' being the first day of the week (see
+            week_start()), sorted by it.
+            traffic (frozenset): Traffic densities of every order, including those left out of the tables.
+            weather (frozenset): Weather conditions of every order, including those left out of the tables.
+            first (Timestamp): Date of the first order of the tables, None when there is none.
+            last (Timestamp): Date of the last order of the tables, None when there is none.
+    """
+
+    def __init__(self, drivers, weeks, traffic, weather, first, last):
+        self.drivers = drivers
+        self.weeks = weeks
+        self.traffic = traffic
+        self.weather = weather
+        self.first = first
+        self.last = last
+
+    def __len__(self):
+        return len(self.weeks)
+
+    def copy(self, deep=False):
+        # Shallow copy, as loader memoization hands out for DataFrames.
+        return DriverTables(self.drivers.copy(deep=deep), self.weeks.copy(deep=deep), self.traffic, self.weather,
+                            self.first, self.last)
+
+
+def week_start(dates):
+    # First day of the '%U' week of each date (see curry_company.cube.week_of_year()): the Sunday before it, or
+    # January 1st when that Sunday is in the year before, so the days of a week always share their week of the year.
+    dates = pd.DatetimeIndex(dates).normalize()
+    sunday = dates - pd.to_timedelta((dates.dayofweek + 1) % 7, unit='D')
+    new_year = pd.to_datetime(dates.year.astype(str) + '-01-01')
+    return sunday.where(sunday >= new_year, new_year)
+
+
+def _is_week_start(date):
+    return date == week_start([date])[0]
+
+
+def build_driver_cells(df1):
+    # Cells of the orders per DRIVER_DIMENSIONS.
+    return build_cube(df1, DRIVER_DIMENSIONS, DRIVER_MEASURES)
+
+
+def build_week_cells(df1):
+    # Cells of the orders per WEEK_DIMENSIONS.
+    return build_cube(df1.assign(Order_Date=week_start(df1['Order_Date'])), WEEK_DIMENSIONS, DRIVER_MEASURES)
+
+
+def weekly_drivers(weeks):
+    # Number of distinct delivery drivers of each week of the year, from cells per WEEK_DIMENSIONS.
+    return (weeks.loc[:, ['Delivery_person_ID']]
+            .assign(week_of_year=week_of_year(weeks['Order_Date']))
+            .groupby('week_of_year')
+            .nunique()
+            .reset_index())
+
+
+def build_driver_tables(df1):
+    """
+        Builds the driver tables of the orders.
+
+        Parameters:
+            df1 (DataFrame): Cleaned orders with the COLUMNS columns.
+        Returns:
+            DriverTables: Tables of the orders of DEFAULT_TRAFFIC and DEFAULT_WEATHER.
+    """
+    traffic, weather = df1['Road_traffic_density'], df1['Weatherconditions']
+    present = frozenset(traffic.dropna().unique()), frozenset(weather.dropna().unique())
+    df1 = df1.loc[traffic.isin(DEFAULT_TRAFFIC) & weather.isin(DEFAULT_WEATHER), COLUMNS]
+    dates = df1['Order_Date']
+    return DriverTables(build_driver_cells(df1), build_week_cells(df1), *present,
+                        dates.min() if len(dates) else None, dates.max() if len(dates) else None)
+
+
+def merge_driver_tables(tables, other):
+    # Combines the driver tables of two sets of orders, e.g. the current ones and those of a new batch of orders.
+    dates = [date for date in (tables.first, tables.last, other.first, other.last) if date is not None]
+    return DriverTables(merge_cubes(tables.drivers, other.drivers, DRIVER_DIMENSIONS),
+                        merge_cubes(tables.weeks, other.weeks, WEEK_DIMENSIONS),
+                        tables.traffic | other.traffic, tables.weather | other.weather,
+                        min(dates) if dates else None, max(dates) if dates else None)
+
+
+def _covers(tables, date_cutoff, traffic_options, weather_conditions, date_start=None):
+    # Whether the tables hold exactly the orders of a selection: it keeps the orders of the same traffic densities and
+    # weather conditions, and its date range is made of whole weeks (its ends may also lie beyond the orders).
+    if (tables.traffic & set(traffic_options) != tables.traffic & set(DEFAULT_TRAFFIC)
+            or tables.weather & set(weather_conditions) != tables.weather & set(DEFAULT_WEATHER)):
+        return False
+    if tables.first is None:
+        return True
+    return ((date_start is None or date_start <= tables.first or _is_week_start(date_start))
+            and (date_cutoff > tables.last or _is_week_start(date_cutoff)))
+
+
+def week_cells(tables, date_cutoff, traffic_options, weather_conditions, date_start=None):
+    # Cells per WEEK_DIMENSIONS of the orders of a selection, or None when the tables can't answer it.
+    if not _covers(tables, date_cutoff, traffic_options, weather_conditions, date_start):
+        return None
+    if tables.first is None:
+        return tables.weeks
+    # Ends beyond the orders are brought back to them, then the start to the first day of its week.
+    start = week_start([tables.first if date_start is None else max(date_start, tables.first)])[0]
+    cutoff = min(date_cutoff, tables.last + pd.Timedelta(days=1))
+    return tables.weeks.iloc[date_slice(tables.weeks['Order_Date'], cutoff, start)]
+
+
+def driver_cells(tables, date_cutoff, traffic_options, weather_conditions, date_start=None):
+    # Cells per DRIVER_DIMENSIONS of the orders of a selection, or None when the tables can't answer it. A selection
+    # of every date reads the driver cells as they are, others combine the cells of their weeks.
+    if not _covers(tables, date_cutoff, traffic_options, weather_conditions, date_start):
+        return None
+    if tables.first is None or ((date_start is None or date_start <= tables.first) and date_cutoff > tables.last):
+        return tables.drivers
+    weeks = week_cells(tables, date_cutoff, traffic_options, weather_conditions, date_start)
+    return combine_cells(weeks, DRIVER_DIMENSIONS, WEEK_DIMENSIONS)
+
+
+def drivers_per_week(tables, date_cutoff, traffic_options, weather_conditions, date_start=None):
+    # weekly_drivers() of the orders of a selection, or None when the tables can't answer it.
+    weeks = week_cells(tables, date_cutoff, traffic_options, weather_conditions, date_start)
+    return None if weeks is None else weekly_drivers(weeks)
@@ -0,0 +1,74 @@
+# Libraries:
+from curry_company.cube import rollup
+from curry_company.ranking import rank_per_group
+
+# Inputs of the view, in the order its computations receive them (see curry_company.reports). The overall metrics and
+# rating tables come from the cube, the tables of drivers from the driver cells (see curry_company.driver_tables).
+INPUTS = ['cube', 'driver_cells']
+
+
+def overall_metrics(cube):
+    # Oldest and youngest drivers, best and worst vehicle conditions.
+    ages = rollup(cube, measure='Delivery_person_Age')
+    vehicles = rollup(cube, measure='Vehicle_condition')
+    return {'oldest': ages['max'], 'youngest': ages['min'],
+            'best_vehicle': vehicles['max'], 'worst_vehicle': vehicles['min']}
+
+
+def personnel_ratings(drivers):
+    # Average rating of each delivery driver, over the cells of all of their cities.
+    df_aux = (rollup(drivers, 'Delivery_person_ID', 'Delivery_person_Ratings')
+              .loc[:, ['mean']]
+              .reset_index()
+              .round(2))
+    df_aux.columns = ['Delivery Person ID', 'Average Rating']
+    return df_aux
+
+
+def ratings_by(cube, by, label):
+    """
+        Average and standard deviation of the drivers ratings for each value of a dimension.
+
+        Parameters:
+            cube (DataFrame): Filtered cube cells.
+            by (str): Dimension of the cube, e.g. 'Road_traffic_density'.
+            label (str): Name shown for the dimension.
+        Returns:
+            DataFrame: Indexed by label, with the 'Average' and 'Standard Deviation' columns rounded to 2 decimals.
+    """
+    avg_std = (rollup(cube, by, 'Delivery_person_Ratings')
+               .rename_axis(label)
+               .loc[:, ['mean', 'std']]
+               .round(2))
+    avg_std.columns = ['Average', 'Standard Deviation']
+    return avg_std
+
+
+def top_delivers(drivers, k=10):
+    # Fastest and slowest k delivery drivers of every city present in the data, both found in one pass over the
+    # average time of each driver cell.
+    df2 = (rollup(drivers, ['City', 'Delivery_person_ID'], 'Time_taken(min)')
+           .loc[:, ['mean']]
+           .reset_index()
+           .rename(columns={'mean': 'Time Taken (min)', 'Delivery_person_ID': 'Delivery Person ID'}))
+    fastest, slowest = rank_per_group(df2, 'City', 'Delivery Person ID', 'Time Taken (min)', k=k)
+    return fastest, slowest
+
+
+def report(cube, drivers):
+    """
+        Every metric and table of the Delivery Drivers view.
+
+        Parameters:
+            cube (DataFrame): Filtered cube cells.
+            drivers (DataFrame): Filtered driver cells, per city and delivery driver.
+        Returns:
+            dict: Name -> value, dict of values or DataFrame. 'top_delivers' is the (fastest, slowest) pair.
+    """
+    return {
+        'overall_metrics': overall_metrics(cube),
+        'personnel_ratings': personnel_ratings(drivers),
+        'ratings_by_traffic': ratings_by(cube, 'Road_traffic_density', 'Road Traffic Density'),
+        'ratings_by_weather': ratings_by(cube, 'Weatherconditions', 'Weather Condition'),
+        'top_delivers': top_delivers(drivers, k=10),
+    }
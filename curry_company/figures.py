@@ -0,0 +1,166 @@
+# Libraries:
+import numpy as np
+import pandas as pd
+from plotly.basedatatypes import BaseFigure
+
+# Points kept per trace of a series, about the width in pixels of a full-width chart: more points than pixels only
+# make the figure heavier to send and draw.
+MAX_POINTS = 1000
+
+# Trace types drawn as a series along x, downsampled when longer than MAX_POINTS. Scatter traces only when drawn as
+# lines, markers keep every point. Bars are never downsampled: every bar is a count of its own, a dropped one would be a
+# missing day rather than a smoother line. Bars of dates are grouped into longer periods instead (see bucket_bars()).
+SERIES_TYPES = {'scatter', 'scattergl'}
+
+# Periods bars of dates are grouped by, from the shortest, when there are more than MAX_POINTS bars.
+BAR_PERIODS = ['W', 'MS']
+
+# Per-point properties downsampled along with x and y.
+POINT_PROPERTIES = ['x', 'y', 'text', 'hovertext', 'customdata']
+
+# Subplot settings of the template, needed only by figures with traces of these types (or their own subplot).
+SUBPLOT_TYPES = {
+    'polar': {'barpolar', 'scatterpolar', 'scatterpolargl'},
+    'ternary': {'scatterternary'},
+    'scene': {'scatter3d', 'surface', 'mesh3d', 'cone', 'streamtube', 'volume', 'isosurface'},
+    'geo': {'scattergeo', 'choropleth'},
+    'mapbox': {'scattermapbox', 'choroplethmapbox', 'densitymapbox'},
+}
+
+
+def lttb(x, y, threshold):
+    """
+        Largest-Triangle-Three-Buckets downsampling: the points of a series that best keep its visual shape.
+
+        The first and last points are kept. Every other bucket of the series keeps the point forming the largest
+        triangle with the point kept in the previous bucket and the mean of the next bucket, so peaks and dips stay.
+
+        Parameters:
+            x (ndarray): Numeric x of the points, sorted.
+            y (ndarray): Numeric y of the points, missing values are never picked over a number.
+            threshold (int): Number of points to keep.
+        Returns:
+            ndarray: Sorted positions of the kept points, all of them when the series is not longer than threshold.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    missing = np.isnan(y)
+    # Bucket boundaries: the points between the first and the last are split into threshold - 2 buckets.
+    bounds = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    bounds[-1] = n - 1
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+    for i in range(threshold - 2):
+        start, stop = bounds[i], bounds[i + 1]
+        # Mean of the next bucket (the last point for the last bucket), over its present values.
+        next_start, next_stop = (bounds[i + 1], bounds[i + 2]) if i + 2 < len(bounds) else (n - 1, n)
+        present = ~missing[next_start:next_stop]
+        mean_x = x[next_start:next_stop].mean()
+        mean_y = y[next_start:next_stop][present].mean() if present.any() else y[selected]
+        areas = np.abs((x[selected] - mean_x) * (y[start:stop] - y[selected])
+                       - (x[selected] - x[start:stop]) * (mean_y - y[selected]))
+        selected = start + int(np.argmax(np.where(np.isnan(areas), -1, areas)))
+        indices[i + 1] = selected
+    return indices
+
+
+def _numeric(values):
+    # Numeric positions of x values: dates as nanoseconds, numbers as they are, anything else (e.g. week labels) by
+    # rank of appearance.
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype('int64').astype('float64')
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype('float64')
+    return np.arange(len(values), dtype='float64')
+
+
+def bucket_bars(df1, x, y, how='sum', max_bars=MAX_POINTS):
+    """
+        Groups the bars of a chart over dates into weeks, then months, until there are at most max_bars of them.
+
+        Parameters:
+            df1 (DataFrame): One row per bar.
+            x (str): Column of the dates.
+            y (str or list): Column(s) of the bar values.
+            how (str): Aggregation of the values of a period: 'sum' for counts, 'mean' for rates.
+            max_bars (int): Bars kept.
+        Returns:
+            DataFrame: The x and y columns, one row per bar, unchanged when there are few enough bars.
+    """
+    for period in BAR_PERIODS:
+        if len(df1) <= max_bars:
+            break
+        df1 = df1.groupby(pd.Grouper(key=x, freq=period))[y].agg(how).reset_index()
+    return df1
+
+
+def downsample_trace(trace, max_points=MAX_POINTS):
+    # Keeps the LTTB points of a long series trace, in place. Traces that are not series along a sorted x are left
+    # as they are.
+    if trace.type not in SERIES_TYPES or trace.x is None or trace.y is None or len(trace.x) <= max_points:
+        return trace
+    if 'lines' not in (trace.mode or 'lines'):
+        return trace
+    x = _numeric(trace.x)
+    if len(trace.y) != len(x) or not (np.diff(x) >= 0).all():
+        return trace
+    y = np.asarray(trace.y, dtype='float64')
+    keep = lttb(x, y, max_points)
+    updates = {}
+    for name in POINT_PROPERTIES:
+        values = trace[name]
+        if values is not None and not isinstance(values, str) and len(values) == len(x):
+            updates[name] = np.asarray(values)[keep]
+    trace.update(updates)
+    return trace
+
+
+def prune_template(fig):
+    # Drops the template settings the figure doesn't use: trace defaults of other trace types, and subplot settings
+    # (polar, 3D scenes, maps...) without a subplot of that kind. They are most of the payload of a small figure, and
+    # plotly.js only reads the template for the traces and subplots drawn.
+    template = fig.layout.template.to_plotly_json()
+    types = {trace.type for trace in fig.data}
+    template['data'] = {name: traces for name, traces in template.get('data', {}).items() if name in types}
+    own_layout = fig.layout.to_plotly_json()
+    layout = template.get('layout', {})
+    for name, trace_types in SUBPLOT_TYPES.items():
+        if not types & trace_types and name not in own_layout:
+            layout.pop(name, None)
+    fig.layout.template = template
+    return fig
+
+
+def compact_figure(fig, max_points=MAX_POINTS):
+    """
+        Makes a figure cheaper to send to the browser, in place: long series are downsampled to max_points with LTTB,
+        and the template keeps only what the figure draws.
+
+        Figures of an unchanged result are the same object on every rerun, so they serialize to the same message,
+        which Streamlit then replaces by a reference to the copy the browser already has (see .streamlit/config.toml).
+
+        Parameters:
+            fig (Figure): A Plotly figure, e.g. from plotly.express.
+            max_points (int): Points kept per series trace.
+        Returns:
+            Figure: The same figure.
+    """
+    for trace in fig.data:
+        downsample_trace(trace, max_points)
+    return prune_template(fig)
+
+
+def compact_outputs(value, max_points=MAX_POINTS):
+    # compact_figure() on the figures of a result: a figure, or a dict or tuple holding some, anything else unchanged.
+    if isinstance(value, BaseFigure):
+        return compact_figure(value, max_points)
+    if isinstance(value, dict):
+        return {key: compact_outputs(item, max_points) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return tuple(compact_outputs(item, max_points) for item in value)
+    return value
@@ -0,0 +1,186 @@
+# Libraries:
+from typing import NamedTuple
+
+import pandas as pd
+
+from curry_company import loader
+from curry_company.bitmaps import BitmapIndex
+from curry_company.cube import DIMENSIONS, MEASURES, filter_cube, select_rows
+from curry_company.driver_tables import (COLUMNS as DRIVER_COLUMNS, DRIVER_DIMENSIONS, DRIVER_MEASURES,
+                                         build_driver_cells, build_week_cells, driver_cells, drivers_per_week,
+                                         weekly_drivers)
+from curry_company.instrumentation import stage
+from curry_company.loader import (DATASET_PATH, dataset_version, load_cube, load_dataset, load_driver_tables,
+                                  load_sketches)
+from curry_company.results import cached
+from curry_company.sketches import filter_sketches
+from curry_company.sqlstore import BACKEND, query_cells, query_dates, query_orders, query_weekly_drivers
+
+
+class FilterSpec(NamedTuple):
+    # Sidebar selection shared by the three views: orders from date_start (if any) and before date_cutoff, in one of
+    # the traffic options and one of the weather conditions. Build it with filter_key() so equal selections compare
+    # (and hash) equal.
+    date_cutoff: pd.Timestamp
+    traffic_options: frozenset
+    weather_conditions: frozenset
+    date_start: pd.Timestamp = None
+
+
+def filter_key(date_cutoff, traffic_options, weather_conditions, date_start=None):
+    # Normalized sidebar state: the order in which options were picked does not change the selection.
+    return FilterSpec(pd.Timestamp(date_cutoff), frozenset(traffic_options), frozenset(weather_conditions),
+                      None if date_start is None else pd.Timestamp(date_start))
+
+
+def filter_orders(df1, date_cutoff, traffic_options, weather_conditions, date_start=None, bitmaps=None):
+    # Date, traffic and weather selection of the sidebar. Orders loaded by curry_company.loader are indexed by date,
+    # so the date range is a binary search on the index, other frames fall back to a mask on their dates.
+    dates = df1.index if isinstance(df1.index, pd.DatetimeIndex) else df1['Order_Date']
+    return select_rows(df1, dates, date_cutoff, traffic_options, weather_conditions, date_start, bitmaps)
+
+
+def dataset_dates(path=DATASET_PATH):
+    # First and last order dates, e.g. the bounds of the date sliders, from the query backend (see
+    # curry_company.sqlstore).
+    if BACKEND == 'sqlite':
+        return query_dates(path)
+    return loader.dataset_dates(path)
+
+
+def view_key(spec, path=DATASET_PATH):
+    # Identifies the results computed for a selection of the current dataset, e.g. ('company', name) + view_key(spec).
+    return dataset_version(path), spec
+
+
+def bitmap_index(key, df1, columns=None):
+    # Bitmap index of a loaded frame, built once per dataset version (key) and shared by every selection.
+    def build():
+        with stage('bitmap_index', rows_in=len(df1)):
+            return BitmapIndex(df1, columns)
+
+    return cached(('bitmaps',) + key, build)
+
+
+def select_orders(spec, columns=None, path=DATASET_PATH):
+    """
+        Orders of the dataset matching a selection, cached per dataset version and selection.
+
+        Parameters:
+            spec (FilterSpec): The selection, see filter_key().
+            columns (list): Order columns needed by the caller, or None for all of them.
+            path (str): Path of the raw CSV file.
+        Returns:
+            DataFrame: The filtered orders, to be treated as read-only.
+    """
+    key = ('orders', path, None if columns is None else tuple(columns), dataset_version(path))
+
+    def orders():
+        if BACKEND == 'sqlite':
+            with stage('query_orders') as timing:
+                df1 = query_orders(spec, columns, path)
+                timing['rows_out'] = len(df1)
+            return df1
+        df1 = load_dataset(path, columns)
+        # Every projection shares the rows of the loaded frame, so one index of the selection columns serves them all.
+        bitmaps = bitmap_index(('orders', path, key[-1]), df1, ['Road_traffic_density', 'Weatherconditions'])
+        with stage('filter_orders', rows_in=len(df1)) as timing:
+            df1 = filter_orders(df1, *spec, bitmaps=bitmaps)
+            timing['rows_out'] = len(df1)
+        return df1
+
+    return cached(key + (spec,), orders)
+
+
+def _select_cells(name, load, spec, path, dimensions, measures):
+    # Cells of a cube (see curry_company.cube) matching a selection, cached like the orders.
+    key = (name, path, dataset_version(path))
+
+    def cells():
+        if BACKEND == 'sqlite':
+            with stage('query_' + name) as timing:
+                cube = query_cells(spec, dimensions, measures, path)
+                timing['rows_out'] = len(cube)
+            return cube
+        cube = load(path)
+        bitmaps = bitmap_index(key, cube)
+        with stage('filter_' + name, rows_in=len(cube)) as timing:
+            cube = filter_cube(cube, *spec, bitmaps=bitmaps)
+            timing['rows_out'] = len(cube)
+        return cube
+
+    return cached(key + (spec,), cells)
+
+
+def select_cube(spec, path=DATASET_PATH):
+    # Cube cells matching a selection, to be treated as read-only.
+    return _select_cells('cube', load_cube, spec, path, DIMENSIONS, MEASURES)
+
+
+def select_sketches(spec, path=DATASET_PATH):
+    # Sketch cells matching a selection (see curry_company.loader.load_sketches()), to be treated as read-only.
+    key = ('sketches', path, dataset_version(path))
+
+    def cells():
+        sketches = load_sketches(path)
+        with stage('filter_sketches', rows_in=len(sketches)) as timing:
+            sketches = filter_sketches(sketches, *spec)
+            timing['rows_out'] = len(sketches)
+        return sketches
+
+    return cached(key + (spec,), cells)
+
+
+def _select_drivers(name, query, select, build, spec, path):
+    # Driver-sized results (see curry_company.driver_tables) matching a selection, cached like the orders. They are
+    # queried from the database in the sqlite backend. Otherwise they are read from the memoized driver tables when
+    # those hold exactly the orders of the selection, and else built from the filtered orders.
+    key = (name, path, dataset_version(path))
+
+    def cells():
+        if BACKEND == 'sqlite':
+            with stage('query_' + name) as timing:
+                table = query(spec, path)
+                timing['rows_out'] = len(table)
+            return table
+        tables = load_driver_tables(path)
+        with stage('filter_' + name, rows_in=len(tables)) as timing:
+            table = select(tables, *spec)
+            timing['rows_out'] = None if table is None else len(table)
+        if table is not None:
+            return table
+        orders = select_orders(spec, DRIVER_COLUMNS, path)
+        with stage('build_' + name, rows_in=len(orders)) as timing:
+            table = build(orders)
+            timing['rows_out'] = len(table)
+        return table
+
+    return cached(key + (spec,), cells)
+
+
+def select_driver_cells(spec, path=DATASET_PATH):
+    # Cells per city and delivery driver of the orders matching a selection, to be treated as read-only.
+    def query(spec, path):
+        return query_cells(spec, DRIVER_DIMENSIONS, DRIVER_MEASURES, path)
+
+    return _select_drivers('driver_cells', query, driver_cells, build_driver_cells, spec, path)
+
+
+def select_weekly_drivers(spec, path=DATASET_PATH):
+    # Distinct delivery drivers of each week of the year among the orders matching a selection.
+    return _select_drivers('weekly_drivers', query_weekly_drivers, drivers_per_week,
+                           lambda orders: weekly_drivers(build_week_cells(orders)), spec, path)
+
+
+def select(spec, columns=None, path=DATASET_PATH):
+    """
+        Orders and cube cells of the dataset matching a selection, cached per dataset version and selection.
+
+        Parameters:
+            spec (FilterSpec): The selection, see filter_key().
+            columns (list): Order columns needed by the caller, or None for all of them.
+            path (str): Path of the raw CSV file.
+        Returns:
+            tuple: (orders, cube) filtered DataFrames, to be treated as read-only.
+    """
+    return select_orders(spec, columns, path), select_cube(spec, path)
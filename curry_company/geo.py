@@ -0,0 +1,26 @@
+# Libraries:
+import numpy as np
+
+# Mean Earth radius in km, the same constant used by the haversine package.
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """
+        Great-circle distance between two arrays of points, computed for all rows at once.
+
+        Parameters:
+            lat1, lon1 (array-like): Latitudes and longitudes of the origins, in degrees.
+            lat2, lon2 (array-like): Latitudes and longitudes of the destinations, in degrees.
+        Returns:
+            ndarray: Distances in km.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype='float64')) for x in (lat1, lon1, lat2, lon2))
+    d = np.sin((lat2 - lat1) * 0.5) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) * 0.5) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(d))
+
+
+def delivery_distance(df1):
+    # Distance between the restaurant and the delivery location of each order.
+    return haversine_distance(df1['Restaurant_latitude'], df1['Restaurant_longitude'],
+                              df1['Delivery_location_latitude'], df1['Delivery_location_longitude'])
@@ -0,0 +1,34 @@
+# Libraries:
+import sys
+
+import pandas as pd
+
+from curry_company import storage
+from curry_company.cleaning import clean_code
+from curry_company.loader import DATASET_PATH
+
+
+def ingest_batch(raw, path=DATASET_PATH):
+    """
+        Appends a batch of new raw orders to the stored dataset, without reprocessing the orders already stored.
+
+        The batch is cleaned on its own with clean_code() (which also derives its distances) and saved next to the
+        dataset cache. On their next rerun the pages extend the memoized dataset and cube with the new batch only.
+
+        Parameters:
+            raw (DataFrame or str): Raw order rows with the columns of dataset/train.csv, or the path of a CSV file.
+            path (str): Path of the raw CSV file of the dataset to append to.
+        Returns:
+            DataFrame: The cleaned batch, as stored.
+    """
+    if isinstance(raw, str):
+        raw = pd.read_csv(raw)
+    batch = clean_code(raw)
+    if len(batch):
+        storage.write_batch(batch, path)
+    return batch
+
+
+if __name__ == '__main__':
+    # python -m curry_company.ingest new_orders.csv [dataset/train.csv]
+    ingest_batch(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else DATASET_PATH)
@@ -0,0 +1,215 @@
+# Libraries:
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+# Optional outputs, enabled through environment variables so deployments don't need code changes:
+#   CURRY_COMPANY_DEBUG=1             sidebar panel with the stages of every render
+#   CURRY_COMPANY_METRICS_FILE=path   Prometheus text file rewritten after every render
+#   CURRY_COMPANY_METRICS_PORT=9108   local HTTP endpoint serving the same text
+# Every finished render is also logged as one JSON line on the 'curry_company.instrumentation' logger.
+DEBUG_PANEL = os.environ.get('CURRY_COMPANY_DEBUG') == '1'
+METRICS_FILE = os.environ.get('CURRY_COMPANY_METRICS_FILE')
+METRICS_PORT = int(os.environ.get('CURRY_COMPANY_METRICS_PORT') or 0)
+
+logger = logging.getLogger(__name__)
+
+# Render of the running page script. Streamlit runs each session in its own thread, and curry_company.scheduler
+# copies the context into its workers, so stages timed anywhere during a render are attributed to it.
+_current = contextvars.ContextVar('curry_company_render', default=None)
+
+# Process totals: (page, stage) -> [calls, seconds, rows in, rows out, memory growth], and page -> [renders, seconds].
+# Memory is the resident memory of the whole process: stages running at the same time on scheduler threads share
+# each other's growth, so it is only an approximation of what a stage allocates.
+_stages = {}
+_renders = {}
+_lock = threading.Lock()
+_server = None
+
+
+def _memory():
+    # Resident memory of the process in bytes, or None where /proc is not available.
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class Render:
+    """
+        Stages timed during one run of a page script, created by start_render().
+
+        Parameters:
+            page (str): Name of the page, e.g. 'company'.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.stages = []
+        self.seconds = None
+        self._start = time.perf_counter()
+        self._token = None
+
+    def table(self):
+        # Totals of every stage of the render, in the order they first finished, for the debug panel.
+        df_aux = pd.DataFrame(self.stages, columns=['stage', 'seconds', 'rows_in', 'rows_out', 'memory_mb'])
+        grouped = df_aux.groupby('stage', sort=False)
+        totals = (grouped[['seconds', 'rows_in', 'rows_out', 'memory_mb']]
+                  .sum(min_count=1)
+                  .astype({'rows_in': 'Int64', 'rows_out': 'Int64'}))
+        totals.insert(0, 'calls', grouped.size())
+        return totals.reset_index()
+
+    def finish(self):
+        """
+            Ends the render: adds its total to the process metrics, logs it and refreshes the exports.
+
+            Returns:
+                DataFrame: The stages of the render, see table().
+        """
+        self.seconds = time.perf_counter() - self._start
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        with _lock:
+            total = _renders.setdefault(self.page, [0, 0.0])
+            total[0] += 1
+            total[1] += self.seconds
+        logger.info(json.dumps({'page': self.page, 'seconds': round(self.seconds, 6), 'stages': self.stages}))
+        if METRICS_FILE:
+            write_metrics(METRICS_FILE)
+        return self.table()
+
+
+def start_render(page):
+    # Starts timing a run of a page script: call it first, and finish() on the result once the page is laid out.
+    if METRICS_PORT:
+        serve_metrics(METRICS_PORT)
+    render = Render(page)
+    render._token = _current.set(render)
+    return render
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """
+        Times a named stage of the current render, and counts it in the process metrics.
+
+        Usage: with stage('filter_orders', rows_in=len(df1)) as timing: ... timing['rows_out'] = len(result)
+
+        Parameters:
+            name (str): Name of the stage.
+            rows_in (int): Number of input rows, if meaningful.
+        Returns:
+            dict: Filled by the caller with 'rows_out' when meaningful.
+    """
+    timing = {'rows_out': None}
+    memory = _memory()
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        seconds = time.perf_counter() - start
+        delta = None if memory is None else _memory() - memory
+        render = _current.get()
+        page = render.page if render is not None else ''
+        with _lock:
+            total = _stages.setdefault((page, name), [0, 0.0, 0, 0, 0])
+            total[0] += 1
+            total[1] += seconds
+            total[2] += rows_in or 0
+            total[3] += timing['rows_out'] or 0
+            # Only growth is added, so the total never decreases (a Prometheus counter). Renders keep the signed delta.
+            total[4] += max(delta or 0, 0)
+            if render is not None:
+                render.stages.append({'stage': name, 'seconds': round(seconds, 6), 'rows_in': rows_in,
+                                      'rows_out': timing['rows_out'],
+                                      'memory_mb': None if delta is None else round(delta / 2 ** 20, 2)})
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text():
+    """
+        Process metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Counters per page and stage (calls, seconds, rows in and out, resident memory growth) and per page
+            (renders and their seconds).
+    """
+    series = [
+        ('curry_company_stage_calls_total', 'Times a stage ran.', 0),
+        ('curry_company_stage_seconds_total', 'Time spent in a stage.', 1),
+        ('curry_company_stage_rows_in_total', 'Rows read by a stage.', 2),
+        ('curry_company_stage_rows_out_total', 'Rows returned by a stage.', 3),
+        ('curry_company_stage_memory_bytes_total', 'Resident memory growth during a stage (approximate, process-wide).',
+         4),
+    ]
+    with _lock:
+        stages = {key: list(total) for key, total in _stages.items()}
+        renders = {page: list(total) for page, total in _renders.items()}
+    lines = []
+    for metric, help_text, position in series:
+        lines += ['# HELP {} {}'.format(metric, help_text), '# TYPE {} counter'.format(metric)]
+        lines += ['{}{{page="{}",stage="{}"}} {}'.format(metric, _label(page), _label(name), total[position])
+                  for (page, name), total in sorted(stages.items())]
+    for metric, help_text, position in [('curry_company_renders_total', 'Finished renders of a page.', 0),
+                                        ('curry_company_render_seconds_total', 'Time spent rendering a page.', 1)]:
+        lines += ['# HELP {} {}'.format(metric, help_text), '# TYPE {} counter'.format(metric)]
+        lines += ['{}{{page="{}"}} {}'.format(metric, _label(page), total[position])
+                  for page, total in sorted(renders.items())]
+    return '\n'.join(lines) + '\n'
+
+
+def write_metrics(path):
+    # Replaces the file at once, so a collector (e.g. the node exporter textfile collector) never reads half of it.
+    tmp = '{}.{}.tmp'.format(path, threading.get_ident())
+    with open(tmp, 'w') as file:
+        file.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host='127.0.0.1'):
+    # Serves prometheus_text() on a local port from a daemon thread, started once per process.
+    global _server
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as error:
+                # E.g. the port is taken by another process, which is not retried on every render.
+                logger.warning('Metrics endpoint not started on port %s: %s', port, error)
+                _server = False
+                return None
+            threading.Thread(target=_server.serve_forever, name='curry-company-metrics', daemon=True).start()
+    return _server or None
+
+
+def reset_metrics():
+    # Drops the process totals, e.g. between benchmark runs.
+    with _lock:
+        _stages.clear()
+        _renders.clear()
@@ -0,0 +1,254 @@
+# Libraries:
+import os
+import threading
+
+import pandas as pd
+
+from curry_company import storage
+from curry_company.cleaning import append_frames, concat_frames, index_by_date
+from curry_company.cube import DIMENSIONS, MEASURES, build_cube, merge_cubes
+from curry_company.driver_tables import COLUMNS as DRIVER_COLUMNS, build_driver_tables, merge_driver_tables
+from curry_company.instrumentation import stage
+from curry_company.sketches import COLUMNS as SKETCH_COLUMNS, build_sketches, merge_sketches
+
+DATASET_PATH = 'dataset/train.csv'
+
+# Cleaned frames and cubes memoized per process, keyed by what was built and the absolute path of the source file.
+# Each entry also keeps the file signature and the ingested batches it was built from: replacing or editing the CSV
+# invalidates it on the next call, while new batches only extend it.
+_cache = {}
+# Columns held by each memoized dataset frame (see load_dataset()), None for all of them.
+_columns = {}
+_lock = threading.RLock()
+
+
+def _file_signature(path):
+    if not os.path.exists(path):
+        path = storage.cache_path(path)
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _has_cache(path):
+    # Makes sure the typed cache is up to date, streaming the CSV into it when needed. False when it can't be written.
+    if storage.is_fresh(path):
+        return True
+    try:
+        storage.build_cache(path)
+        return True
+    except OSError:
+        # Read-only deployments still work, they just parse the CSV on every cold start.
+        return False
+
+
+def iter_dataset(path=DATASET_PATH, columns=None):
+    # The cleaned dataset in chunks, from the cache or straight from the CSV. Batches are read separately.
+    if _has_cache(path):
+        return storage.iter_cache(path, columns)
+    return (chunk if columns is None else chunk.loc[:, columns] for chunk in storage.read_chunks(path))
+
+
+def _read_dataset(path, columns, batches):
+    if _has_cache(path):
+        with stage('read_cache') as timing:
+            df1 = storage.read_cache(path, columns)
+            timing['rows_out'] = len(df1)
+    else:
+        df1 = concat_frames(list(iter_dataset(path, columns)))
+    if batches:
+        df1 = append_frames(df1, storage.read_batches(path, batches, columns))
+    return _by_date(df1)
+
+
+def _by_date(df1):
+    # Frames with the order dates are kept sorted and indexed by date.
+    if 'Order_Date' not in df1.columns:
+        return df1
+    with stage('index_by_date', rows_in=len(df1)):
+        return index_by_date(df1)
+
+
+def _build_cube(path, batches):
+    # The cube is folded chunk by chunk, so building it never holds more than one chunk of orders in memory.
+    cube = None
+    for chunk in iter_dataset(path, DIMENSIONS + MEASURES):
+        with stage('build_cube', rows_in=len(chunk)):
+            cells = build_cube(chunk)
+            cube = cells if cube is None else merge_cubes(cube, cells)
+    if batches:
+        cube = _extend_cube(path, cube, batches)
+    return cube
+
+
+def _extend_cube(path, cube, batches):
+    # Only the cells of the new orders are built, and merged into the existing ones.
+    return merge_cubes(cube, build_cube(storage.read_batches(path, batches, DIMENSIONS + MEASURES)))
+
+
+def _build_sketches(path, batches):
+    # Folded chunk by chunk like the cube.
+    sketches = None
+    for chunk in iter_dataset(path, SKETCH_COLUMNS):
+        with stage('build_sketches', rows_in=len(chunk)):
+            if sketches is None:
+                sketches = build_sketches(chunk)
+            else:
+                sketches = merge_sketches(sketches, build_sketches(chunk))
+    if batches:
+        sketches = _extend_sketches(path, sketches, batches)
+    return sketches
+
+
+def _extend_sketches(path, sketches, batches):
+    cells = build_sketches(storage.read_batches(path, batches, SKETCH_COLUMNS))
+    return merge_sketches(sketches, cells)
+
+
+def _build_driver_tables(path, batches):
+    # Folded chunk by chunk like the cube.
+    tables = None
+    for chunk in iter_dataset(path, DRIVER_COLUMNS):
+        with stage('build_driver_tables', rows_in=len(chunk)):
+            cells = build_driver_tables(chunk)
+            tables = cells if tables is None else merge_driver_tables(tables, cells)
+    if batches:
+        tables = _extend_driver_tables(path, tables, batches)
+    return tables
+
+
+def _extend_driver_tables(path, tables, batches):
+    return merge_driver_tables(tables, build_driver_tables(storage.read_batches(path, batches, DRIVER_COLUMNS)))
+
+
+def load_dataset(path=DATASET_PATH, columns=None):
+    """
+        Loads and cleans the delivery dataset once per process and shares it across reruns and sessions.
+
+        The cleaned data is read from the Parquet cache next to the CSV, which is rebuilt whenever the CSV is newer,
+        followed by the batches added with curry_company.ingest.ingest_batch().
+
+        Parameters:
+            path (str): Path of the raw CSV file.
+            columns (list): Columns the caller needs, or None for all of them.
+        Returns:
+            DataFrame: A shallow copy of the cached cleaned dataframe. Adding columns to it is safe, but values must
+            be treated as read-only because they are shared with every other session.
+    """
+    # One frame per dataset holds every column requested so far, and callers get a projection of it, so no column is
+    # read, sorted by date or indexed twice. Columns requested later are read on their own and attached to it.
+    key = ('dataset', os.path.abspath(path), None)
+    with _lock:
+        held = _columns.get(key, ())
+        if held is not None:
+            wanted = None if columns is None else held + tuple(col for col in columns if col not in held)
+            if wanted != held:
+                _add_columns(key, path, wanted)
+                held = wanted
+        names = None if held is None else list(held)
+        df1 = _memoized(key, path,
+                        build=lambda batches: _read_dataset(path, names, batches),
+                        extend=lambda df1, batches: _by_date(append_frames(df1, storage.read_batches(path, batches,
+                                                                                                      names))))
+    return df1 if columns is None else _project(df1, columns)
+
+
+def _add_columns(key, path, wanted):
+    # Attaches the missing columns to the memoized frame, read from the same file and batches. The date sort is
+    # stable, so their rows line up with it. A frame of another version of the file is dropped instead.
+    _columns[key] = wanted
+    cached = _cache.pop(key, None)
+    if cached is None or wanted is None or cached[0] != _file_signature(path) or 'Order_Date' not in cached[2]:
+        return
+    signature, batches, df1 = cached
+    missing = [col for col in wanted if col not in df1.columns]
+    extra = _read_dataset(path, missing + ['Order_Date'], batches)
+    if len(extra) != len(df1):
+        return
+    columns = {col: df1[col] for col in df1.columns}
+    columns.update((col, extra[col].set_axis(df1.index)) for col in missing)
+    _cache[key] = (signature, batches, pd.DataFrame(columns, index=df1.index, copy=False))
+
+
+def _project(df1, columns):
+    # Shallow selection of columns: unlike df1.loc[:, columns], the values are not copied.
+    return pd.DataFrame({col: df1[col] for col in columns}, index=df1.index, copy=False)
+
+
+def dataset_version(path=DATASET_PATH):
+    # Identifies the current contents of the dataset (CSV signature and ingested batches), e.g. to key caches of
+    # results computed from it.
+    return _file_signature(path), tuple(storage.list_batches(path))
+
+
+def dataset_dates(path=DATASET_PATH):
+    # First and last order dates, e.g. the bounds of the date sliders, read from the cube instead of the orders.
+    dates = load_cube(path)['Order_Date']
+    return dates.min().to_pydatetime(), dates.max().to_pydatetime()
+
+
+def load_cube(path=DATASET_PATH):
+    """
+        Pre-aggregated cube of the delivery dataset (see curry_company.cube), memoized like load_dataset().
+
+        Parameters:
+            path (str): Path of the raw CSV file.
+        Returns:
+            DataFrame: A shallow copy of the cached cube, to be treated as read-only.
+    """
+    key = ('cube', os.path.abspath(path), None)
+    return _memoized(key, path,
+                     build=lambda batches: _build_cube(path, batches),
+                     extend=lambda cube, batches: _extend_cube(path, cube, batches))
+
+
+def load_sketches(path=DATASET_PATH):
+    """
+        Approximate sketches of the delivery dataset (see curry_company.sketches), memoized like load_dataset() and
+        extended incrementally when batches are ingested.
+
+        Parameters:
+            path (str): Path of the raw CSV file.
+        Returns:
+            Sketches: A shallow copy of the cached sketches, to be treated as read-only.
+    """
+    key = ('sketches', os.path.abspath(path), None)
+    return _memoized(key, path,
+                     build=lambda batches: _build_sketches(path, batches),
+                     extend=lambda sketches, batches: _extend_sketches(path, sketches, batches))
+
+
+def load_driver_tables(path=DATASET_PATH):
+    """
+        Driver tables of the delivery dataset (see curry_company.driver_tables), memoized like load_dataset() and
+        extended incrementally when batches are ingested.
+
+        Parameters:
+            path (str): Path of the raw CSV file.
+        Returns:
+            DriverTables: A shallow copy of the cached tables, to be treated as read-only.
+    """
+    key = ('driver_tables', os.path.abspath(path), None)
+    return _memoized(key, path,
+                     build=lambda batches: _build_driver_tables(path, batches),
+                     extend=lambda tables, batches: _extend_driver_tables(path, tables, batches))
+
+
+def _memoized(key, path, build, extend):
+    signature = _file_signature(path)
+    batches = tuple(storage.list_batches(path))
+    with _lock:
+        cached = _cache.get(key)
+        if cached is None or cached[0] != signature or cached[1] != batches[:len(cached[1])]:
+            cached = (signature, batches, build(batches))
+        elif len(batches) > len(cached[1]):
+            # Only new batches were ingested since this entry was built: extend it instead of reloading everything.
+            cached = (signature, batches, extend(cached[2], batches[len(cached[1]):]))
+        _cache[key] = cached
+    return cached[2].copy(deep=False)
+
+
+def clear_cache():
+    # Drops every memoized dataset, forcing the next load_dataset() call to read the file again.
+    with _lock:
+        _cache.clear()
+        _columns.clear()
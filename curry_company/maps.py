@@ -0,0 +1,86 @@
+# Libraries:
+import folium
+from folium.plugins import FastMarkerCluster, HeatMap
+import numpy as np
+
+MAP_MODES = ['Central locations', 'Delivery density', 'Clustered deliveries']
+
+# Clustered deliveries: each grid cell is a marker carrying its number of orders (see density_grid()), and clusters
+# show the sum of the orders of their markers rather than the number of cells they hold.
+CLUSTER_MARKER = """
+    function (row) {
+        var marker = L.marker(new L.LatLng(row[0], row[1]), {orders: row[2]});
+        marker.bindTooltip(row[2] + ' orders');
+        return marker;
+    }
+"""
+CLUSTER_ICON = """
+    function (cluster) {
+        var orders = cluster.getAllChildMarkers().reduce(function (total, marker) {
+            return total + marker.options.orders;
+        }, 0);
+        var size = orders < 100 ? 'small' : orders < 1000 ? 'medium' : 'large';
+        return L.divIcon({html: '<div><span>' + orders + '</span></div>',
+                          className: 'marker-cluster marker-cluster-' + size, iconSize: new L.Point(40, 40)});
+    }
+"""
+
+
+def central_locations(df1):
+    # Central location of each city by traffic type.
+    cols = ['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']
+    df_aux = (df1.loc[:, cols]
+              .groupby(['City', 'Road_traffic_density'], observed=True)
+              .median()
+              .reset_index())
+    return df_aux
+
+
+def density_grid(df1, precision=2):
+    """
+        Counts deliveries per cell of a latitude/longitude grid, so maps scale with occupied cells instead of orders.
+
+        Parameters:
+            df1 (DataFrame): Orders with the delivery location columns.
+            precision (int): Decimal places of the grid, 2 is roughly 1 km.
+        Returns:
+            DataFrame: One row per occupied cell, with its latitude, longitude and number of orders.
+    """
+    cols = ['Delivery_location_latitude', 'Delivery_location_longitude']
+    df_aux = (df1.loc[:, cols]
+              .round(precision)
+              .value_counts(sort=False)
+              .reset_index(name='orders'))
+    df_aux.columns = ['latitude', 'longitude', 'orders']
+    return df_aux
+
+
+def build_map(df1, mode, centers=None):
+    # Draw the map. centers replaces central_locations(df1), e.g. with approximate medians.
+    map1 = folium.Map()
+
+    if mode == 'Central locations':
+        df_aux = central_locations(df1) if centers is None else centers
+        # Marker receives a list of latitude and longitude, and we add to the map created with add_to.
+        for city, traffic, latitude, longitude in df_aux.itertuples(index=False):
+            folium.Marker([latitude, longitude], popup='{} - {}'.format(city, traffic)).add_to(map1)
+        return map1
+
+    df_aux = density_grid(df1)
+    if df_aux.empty:
+        return map1
+    locations = df_aux.loc[:, ['latitude', 'longitude']].to_numpy()
+    if mode == 'Delivery density':
+        weights = df_aux['orders'].to_numpy() / df_aux['orders'].max()
+        HeatMap(np.column_stack([locations, weights]).tolist(), radius=12).add_to(map1)
+    else:
+        # One marker per occupied grid cell, clustered in the browser and weighted by its orders.
+        data = np.column_stack([locations, df_aux['orders'].to_numpy()]).tolist()
+        FastMarkerCluster(data, callback=CLUSTER_MARKER, icon_create_function=CLUSTER_ICON).add_to(map1)
+    map1.fit_bounds([locations.min(axis=0).tolist(), locations.max(axis=0).tolist()])
+    return map1
+
+
+def render_map(map1):
+    # Same HTML streamlit_folium.folium_static renders, returned as a string so it can be cached.
+    return folium.Figure().add_child(map1).render()
@@ -0,0 +1,86 @@
+# Libraries:
+import argparse
+import datetime
+import importlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import plotly.io as pio
+
+from curry_company import storage
+from curry_company.driver_tables import DEFAULT_TRAFFIC, DEFAULT_WEATHER
+from curry_company.filters import dataset_dates, filter_key
+from curry_company.loader import DATASET_PATH
+from curry_company.reports import VIEWS, compute_report
+from curry_company.snapshots import spec_from_json, write_snapshot
+
+
+def default_preset(path=DATASET_PATH):
+    # Selection the pages open with: the whole date range of the dataset, every traffic density and weather condition.
+    first_date, last_date = dataset_dates(path)
+    return filter_key(last_date + datetime.timedelta(days=1), DEFAULT_TRAFFIC, DEFAULT_WEATHER, date_start=first_date)
+
+
+def read_presets(path):
+    # Presets file: a JSON list of {"date_cutoff": "2022-04-13", "traffic_options": [...], "weather_conditions": [...]},
+    # optionally with a "date_start".
+    with open(path) as file:
+        return [spec_from_json(preset) for preset in json.load(file)]
+
+
+def _init_worker():
+    # Figures get the template Streamlit registers (on import) and sets as the default in the pages, which
+    # st.plotly_chart() colors with the theme of the page: snapshots then look the same as the outputs computed live.
+    importlib.import_module('streamlit.elements.lib.streamlit_plotly_theme')
+    pio.templates.default = 'streamlit'
+
+
+def _render(view, spec, path):
+    # Runs in a worker process, which loads the dataset once (from the Parquet cache) and reuses it for its next tasks.
+    start = time.perf_counter()
+    target = write_snapshot(view, spec, compute_report(view, spec, path), path)
+    return view, spec, target, time.perf_counter() - start
+
+
+def prerender(presets, path=DATASET_PATH, views=None, workers=None):
+    """
+        Computes and stores every output of the views for a list of selections, in parallel across processes.
+
+        The pages then read these snapshots instead of computing anything when their sidebar matches a preset, until
+        the dataset changes or new batches are ingested.
+
+        Parameters:
+            presets (list): FilterSpec selections to render.
+            path (str): Path of the raw CSV file.
+            views (list): Names of the views to render, or None for all of VIEWS.
+            workers (int): Number of worker processes, or None for one per CPU.
+        Returns:
+            list: (view, spec, snapshot directory, seconds) of every rendered snapshot.
+    """
+    # The typed cache is built once here, so workers don't all parse the CSV.
+    if not storage.is_fresh(path):
+        storage.build_cache(path)
+    tasks = [(view, spec) for spec in presets for view in (views or VIEWS)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = [executor.submit(_render, view, spec, path) for view, spec in tasks]
+        return [future.result() for future in futures]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pre-renders the dashboard views for a list of filter presets.')
+    parser.add_argument('--dataset', default=DATASET_PATH, help='raw CSV file of the dataset')
+    parser.add_argument('--presets', help='JSON file with the presets (default: the selection the pages open with)')
+    parser.add_argument('--views', nargs='+', choices=list(VIEWS), help='views to render (all)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    args = parser.parse_args(argv)
+
+    presets = read_presets(args.presets) if args.presets else [default_preset(args.dataset)]
+    for view, spec, target, seconds in prerender(presets, args.dataset, args.views, args.workers):
+        print('{:<12} {:>8.2f}s  {}'.format(view, seconds, target))
+
+
+if __name__ == '__main__':
+    # python -m curry_company.prerender [--presets presets.json] [--dataset dataset/train.csv]
+    main()
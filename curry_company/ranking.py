@@ -0,0 +1,49 @@
+# Libraries:
+import numpy as np
+
+
+def _smallest(values, k):
+    # Positions of the k smallest values in ascending order, ties broken by position. Only the candidates found by a
+    # partial partition are sorted, never the whole array.
+    if len(values) > k:
+        kth = np.partition(values, k - 1)[k - 1]
+        candidates = np.flatnonzero(values <= kth)
+    else:
+        candidates = np.arange(len(values))
+    order = np.lexsort((candidates, values[candidates]))
+    return candidates[order][:k]
+
+
+def rank_per_group(df1, group, item, value, k=10):
+    """
+        Lowest and highest k items of every group by their mean value, e.g. the fastest and slowest drivers per city.
+
+        Parameters:
+            df1 (DataFrame): Rows with the group, item and value columns.
+            group (str): Column whose values split the ranking (every value present is ranked).
+            item (str): Column identifying the ranked items.
+            value (str): Column averaged per item.
+            k (int): Number of items kept at each end of every group.
+        Returns:
+            tuple: (lowest, highest) DataFrames with the group, item and mean value columns, ordered by group and then
+            by value (ascending for lowest, descending for highest).
+    """
+    means = df1.loc[:, [group, item, value]].groupby([group, item], observed=True)[value].mean().dropna()
+    values = means.to_numpy(dtype='float64')
+    # The groupby output is sorted by group, so every group is a contiguous slice.
+    codes = means.index.codes[0]
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [len(values)]])
+
+    lowest, highest = [], []
+    for start, end in zip(starts, ends):
+        if start == end:
+            continue
+        lowest.append(start + _smallest(values[start:end], k))
+        highest.append(start + _smallest(-values[start:end], k))
+
+    ranked = means.reset_index()
+    empty = np.array([], dtype='int64')
+    return (ranked.take(np.concatenate(lowest) if lowest else empty).reset_index(drop=True),
+            ranked.take(np.concatenate(highest) if highest else empty).reset_index(drop=True))
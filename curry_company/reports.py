@@ -0,0 +1,94 @@
+# Libraries:
+from curry_company import company, drivers, restaurants
+from curry_company.figures import compact_outputs
+from curry_company.filters import (select_cube, select_driver_cells, select_orders, select_sketches,
+                                   select_weekly_drivers, view_key)
+from curry_company.instrumentation import stage
+from curry_company.loader import DATASET_PATH
+from curry_company.results import cached
+from curry_company.scheduler import run_parallel
+from curry_company.snapshots import read_snapshot, snapshot_stamp
+
+# Views of the dashboard. Each module has the INPUTS its computations receive, in order, and a report(*inputs)
+# function. Views reading the orders also have the COLUMNS they read.
+VIEWS = {'company': company, 'drivers': drivers, 'restaurants': restaurants}
+
+
+def select_inputs(view, spec, path=DATASET_PATH, names=None):
+    # Inputs of a view matching a selection, all of its INPUTS or only the given names: only those are loaded and
+    # filtered.
+    module = VIEWS[view]
+    sources = {'orders': lambda: select_orders(spec, module.COLUMNS, path),
+               'cube': lambda: select_cube(spec, path),
+               'sketches': lambda: select_sketches(spec, path),
+               'driver_cells': lambda: select_driver_cells(spec, path),
+               'weekly_drivers': lambda: select_weekly_drivers(spec, path)}
+    return tuple(sources[name]() for name in (module.INPUTS if names is None else names))
+
+
+def compute_report(view, spec, path=DATASET_PATH):
+    """
+        Computes every output of one dashboard view without Streamlit, e.g. for batch jobs or another front end.
+
+        Parameters:
+            view (str): One of VIEWS.
+            spec (FilterSpec): The selection, see curry_company.filters.filter_key().
+            path (str): Path of the raw CSV file.
+        Returns:
+            dict: Output name -> value, DataFrame or Plotly figure, see the report() function of the view module.
+            Figures are compacted for sending, see curry_company.figures.compact_figure().
+    """
+    outputs = VIEWS[view].report(*select_inputs(view, spec, path))
+    return {name: compact_outputs(value) for name, value in outputs.items()}
+
+
+class ViewResults:
+    """
+        Outputs of one view for one selection, as the pages read them.
+
+        Outputs come from the pre-rendered snapshot of the selection when there is one (see curry_company.prerender),
+        otherwise they are computed on first use and kept in the shared result cache. The dataset is only loaded and
+        filtered when something has to be computed, and then only the inputs that computation names.
+
+        Parameters:
+            view (str): One of VIEWS.
+            spec (FilterSpec): The selection, see curry_company.filters.filter_key().
+            path (str): Path of the raw CSV file.
+    """
+
+    def __init__(self, view, spec, path=DATASET_PATH):
+        self.view = view
+        self.spec = spec
+        self.path = path
+        self.key = view_key(spec, path)
+        # Keyed by the manifest stamp too, so a snapshot pre-rendered after a miss is served on the next rerun.
+        stamp = snapshot_stamp(view, spec, path)
+        self.snapshot = cached(('snapshot', view, path, stamp) + self.key, self._read_snapshot) or {}
+
+    def _read_snapshot(self):
+        with stage('read_snapshot'):
+            return read_snapshot(self.view, self.spec, self.path)
+
+    def get(self, name, compute, inputs):
+        # compute receives the filtered inputs it needs, named after the view's INPUTS, as keyword arguments: e.g.
+        # get('order_metric', lambda cube: company.order_metric(cube), ['cube']) only selects the cube cells, and the
+        # orders (the view's COLUMNS) are not loaded. Only actual computations are timed, as a stage named after the
+        # output. Figures are compacted once, when computed, so every rerun sends the same compact figure.
+        if name in self.snapshot:
+            return self.snapshot[name]
+        return cached((self.view, name, self.path) + self.key, lambda: self._compute(name, compute, inputs))
+
+    def _compute(self, name, compute, inputs):
+        values = self.data(inputs)
+        with stage(name, rows_in=len(values[0]) if values else None):
+            return compact_outputs(compute(**dict(zip(inputs, values))))
+
+    def get_all(self, computations):
+        # Several outputs at once, name -> (compute, inputs) as get(): the ones to compute run concurrently (see
+        # curry_company.scheduler) and the results come back in the order of computations, i.e. the page layout.
+        computed = run_parallel({name: lambda name=name, compute=compute, inputs=inputs: self.get(name, compute, inputs)
+                                 for name, (compute, inputs) in computations.items() if name not in self.snapshot})
+        return {name: self.snapshot[name] if name in self.snapshot else computed[name] for name in computations}
+
+    def data(self, names=None):
+        return select_inputs(self.view, self.spec, self.path, names)
@@ -0,0 +1,133 @@
+# Libraries:
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from curry_company.aggregation import aggregate
+from curry_company.sketches import approximate, distinct_drivers
+
+# Inputs of the view, in the order its computations receive them (see curry_company.reports). The distinct drivers
+# come from the driver cells (see curry_company.driver_tables), every other statistic from the cube.
+INPUTS = ['driver_cells', 'cube', 'sketches']
+
+# Every statistic of the view, computed in one pass over the cube: name -> (group keys, measure)
+METRICS = {
+    'distance': (None, 'distance'),
+    'distance_by_city': ('City', 'distance'),
+    'time_by_festival': ('Festival', 'Time_taken(min)'),
+    'time_by_city': ('City', 'Time_taken(min)'),
+    'time_by_city_order': (['City', 'Type_of_order'], 'Time_taken(min)'),
+    'time_by_city_traffic': (['City', 'Road_traffic_density'], 'Time_taken(min)'),
+}
+
+
+def view_metrics(cube):
+    # Rollups of METRICS, the input of every other function of this module.
+    return aggregate(cube, METRICS)
+
+
+def delivery_drivers(drivers, sketches=None):
+    # Number of distinct delivery drivers, estimated from the sketches when given (approximate mode).
+    if sketches is not None:
+        return int(round(distinct_drivers(sketches)))
+    return len(drivers.loc[:, 'Delivery_person_ID'].unique())
+
+
+def avg_std_time_on_traffic(metrics):
+    df_aux = metrics['time_by_city_traffic'].loc[:, ['mean', 'std']]
+    df_aux.columns = ['avg_time', 'std_time']
+    df_aux = df_aux.reset_index().astype({'City': str, 'Road_traffic_density': str})
+    fig = px.sunburst(df_aux, path=['City', 'Road_traffic_density'], values='avg_time', color='std_time',
+                      color_continuous_scale='RdBu', color_continuous_midpoint=np.average(df_aux['std_time']))
+    return fig
+
+
+def avg_std_time_chart(metrics):
+    df_aux = metrics['time_by_city'].loc[:, ['mean', 'std']].round(0)
+    df_aux.columns = ['avg_time', 'std_time']
+    df_aux = df_aux.reset_index()
+    fig = go.Figure()
+    fig.add_trace(go.Bar(name='Control', x=df_aux['City'], y=df_aux['avg_time'],
+                         error_y=dict(type='data', array=df_aux['std_time']),
+                         marker_color='lightblue'))
+    fig.update_traces(text=df_aux['avg_time'], textposition='auto', textfont=dict(size=14))
+    fig.update_layout(barmode='group')
+    return fig
+
+
+def avg_std_time_delivery(metrics, op, festival):
+    """
+        This function calculates the mean time and standard deviation for delivery time.
+
+        Parameters:
+            metrics (dict): The view metrics computed by view_metrics(), including 'time_by_festival'.
+            op (str): The type of operation, either 'avg_time' or 'std_time'.
+            festival (str): 'Yes' or 'No'
+        Returns:
+            DataFrame: A dataframe with two columns and one row, containing the calculated results.
+    """
+
+    df_aux = metrics['time_by_festival'].loc[:, ['mean', 'std']]
+
+    df_aux.columns = ['avg_time', 'std_time']
+    df_aux = df_aux.reset_index()
+    df_aux = np.round(df_aux.loc[df_aux['Festival'] == festival, op], 2)
+    return df_aux
+
+
+def festival_times(metrics):
+    # Average and standard deviation of the delivery time with and without Festival.
+    return {'avg_time_festival': avg_std_time_delivery(metrics, 'avg_time', festival='Yes'),
+            'std_time_festival': avg_std_time_delivery(metrics, 'std_time', festival='Yes'),
+            'avg_time_no_festival': avg_std_time_delivery(metrics, 'avg_time', festival='No'),
+            'std_time_no_festival': avg_std_time_delivery(metrics, 'std_time', festival='No')}
+
+
+def avg_std_time_by_city_order(metrics):
+    # Average and standard deviation of the delivery time by city and type of order.
+    df_aux = (metrics['time_by_city_order']
+              .rename_axis(['City', 'Type of Order'])
+              .loc[:, ['mean', 'std']]
+              .round(2))
+
+    df_aux.columns = ['Avg Time', 'Std Time']
+
+    df_aux = df_aux.reset_index()
+    return df_aux
+
+
+def distance(metrics, fig):
+    # The restaurant to delivery location distance is precomputed once per dataset load (curry_company.geo), so the
+    # metric and the chart only read its rollups.
+    if not fig:
+        avg = np.round(metrics['distance']['mean'], 2)
+
+        return avg
+    else:
+        avg = metrics['distance_by_city'].loc[:, ['mean']].rename(columns={'mean': 'distance'})
+        avg = avg.reset_index().round(0)
+        fig = go.Figure(data=[go.Pie(labels=avg['City'], values=avg['distance'], pull=[0, 0.1, 0])])
+        return fig
+
+
+def report(drivers, cube, sketches):
+    """
+        Every metric, table and chart of the Restaurants view.
+
+        Parameters:
+            drivers (DataFrame): Filtered driver cells, per city and delivery driver.
+            cube (DataFrame): Filtered cube cells.
+            sketches (Sketches): Filtered sketch cells, read in approximate mode (see curry_company.sketches).
+        Returns:
+            dict: Name -> value, DataFrame or Plotly figure.
+    """
+    metrics = view_metrics(cube)
+    return {
+        'delivery_drivers': delivery_drivers(drivers, approximate(sketches)),
+        'avg_distance': distance(metrics, fig=False),
+        'festival_times': festival_times(metrics),
+        'avg_std_time_chart': avg_std_time_chart(metrics),
+        'avg_std_time_by_city_order': avg_std_time_by_city_order(metrics),
+        'distance': distance(metrics, fig=True),
+        'avg_std_time_on_traffic': avg_std_time_on_traffic(metrics),
+    }
@@ -0,0 +1,115 @@
+# Libraries:
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+from plotly.basedatatypes import BaseFigure
+
+# Memory budget of the shared result cache.
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def estimate_size(value):
+    # Approximate memory held by a cached result, in bytes. Frames count the strings of their object columns too.
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, BaseFigure):
+        return sum(estimate_size(trace.to_plotly_json()) for trace in value.data)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return 64 + sum(estimate_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        if len(value) > 1000:
+            return 64 + len(value) * estimate_size(value[0])
+        return 64 + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+        Thread-safe LRU cache of computed results (filtered frames, figures, rendered maps) bounded by memory.
+
+        Parameters:
+            max_bytes (int): Memory budget. Least recently used entries are evicted once it is exceeded, and results
+            larger than the whole budget are returned without being cached.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        # Cached values are shared by every session and must be treated as read-only.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            # Callers asking for a key that is being computed (e.g. by concurrent tasks of the same page) wait for it
+            # instead of computing it again.
+            pending = self._pending.get(key)
+            if pending is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._pending[key] = Future()
+        if pending is not None:
+            return pending.result()
+
+        # Computed outside the lock, so a slow result doesn't block the others.
+        try:
+            value = compute()
+        except BaseException as error:
+            with self._lock:
+                self._pending.pop(key).set_exception(error)
+            raise
+        size = estimate_size(value)
+        with self._lock:
+            if size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (value, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+            self._pending.pop(key).set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses}
+
+
+# Shared by every session of the process.
+RESULTS = ResultCache()
+
+
+def cached(key, compute):
+    """
+        Returns the result stored under key in the shared cache, computing it with compute() on a miss.
+
+        Parameters:
+            key (tuple): Hashable key, usually (page, result name, dataset version, filter_key(...)).
+            compute (callable): Builds the result when it is not cached.
+        Returns:
+            The cached or freshly computed result, to be treated as read-only.
+    """
+    return RESULTS.get_or_compute(key, compute)
@@ -0,0 +1,38 @@
+# Libraries:
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads rather than processes: the computations share the cached frames read-only, and NumPy and pandas release the
+# GIL in their heavy loops. Batch jobs that need whole processes use curry_company.prerender.
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    # One pool per process, shared by every session and created on first use.
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='curry-company')
+        return _executor
+
+
+def run_parallel(tasks):
+    """
+        Runs independent computations concurrently and returns their results in the order they were given.
+
+        Parameters:
+            tasks (dict): Name -> function called without arguments. Functions must not call Streamlit.
+        Returns:
+            dict: Name -> result, in the order of tasks. The first exception raised by a task is raised again here.
+    """
+    if len(tasks) < 2 or MAX_WORKERS < 2:
+        return {name: task() for name, task in tasks.items()}
+    # Each task runs in a copy of the caller's context, so its stages count in the caller's render (see
+    # curry_company.instrumentation).
+    futures = {name: _get_executor().submit(contextvars.copy_context().run, task) for name, task in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,302 @@
+# Libraries:
+import os
+
+import numpy as np
+import pandas as pd
+
+from curry_company.cleaning import append_frames
+from curry_company.cube import select_rows
+
+# Optional approximate mode, enabled with CURRY_COMPANY_APPROXIMATE=1: distinct drivers and median coordinates are then
+# read from the sketches instead of the orders, in memory bounded by the number of cells.
+APPROXIMATE = os.environ.get('CURRY_COMPANY_APPROXIMATE') == '1'
+
+# The orders are sketched per combination of these columns, the ones the pages filter and group the sketches by.
+SKETCH_DIMENSIONS = ['Order_Date', 'City', 'Road_traffic_density', 'Weatherconditions']
+
+# HyperLogLog of the delivery drivers: 2 ** 10 registers per cell, about 3% standard error.
+HLL_PRECISION = 10
+
+# Delivery times are whole minutes, so one histogram bin per minute is an exact and mergeable quantile sketch. Longer
+# times fall in the last bin.
+TIME_BINS = 121
+
+# Delivery coordinates: a t-digest of each cell, up to CENTROIDS (mean, weight) pairs over equal ranks of its orders.
+# Cells with fewer orders keep every coordinate, and digests merge without any range fixed in advance.
+COORDINATES = ['Delivery_location_latitude', 'Delivery_location_longitude']
+CENTROIDS = 32
+
+# Order columns the sketches are built from.
+COLUMNS = SKETCH_DIMENSIONS + ['Delivery_person_ID', 'Time_taken(min)'] + COORDINATES
+
+
+def approximate(sketches):
+    # The sketches in approximate mode, None otherwise: what the view functions taking optional sketches receive.
+    return sketches if APPROXIMATE else None
+
+
+class Sketches:
+    """
+        Mergeable sketches of the orders of each cell of SKETCH_DIMENSIONS. Cells combine under any filter or grouping
+        (registers by maximum, histograms by sum, digests by merging their centroids), like the cube cells.
+
+        Parameters:
+            cells (DataFrame): Dimensions of each cell.
+            registers (ndarray): HyperLogLog registers of the delivery drivers, one row per cell.
+            times (ndarray): Histogram of the delivery time in minutes, one row per cell.
+            coordinates (dict): Coordinate column -> centroid means of its digest, one row per cell sorted by mean (NaN
+            for unused centroids).
+            weights (dict): Coordinate column -> orders of each centroid (0 for unused ones).
+    """
+
+    def __init__(self, cells, registers, times, coordinates, weights):
+        self.cells = cells
+        self.registers = registers
+        self.times = times
+        self.coordinates = coordinates
+        self.weights = weights
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __sizeof__(self):
+        # Memory of the arrays, as counted by curry_company.results.estimate_size().
+        arrays = [self.registers, self.times] + list(self.coordinates.values()) + list(self.weights.values())
+        return int(self.cells.memory_usage(index=True).sum()) + sum(array.nbytes for array in arrays)
+
+    def copy(self, deep=False):
+        # Shallow copy, as loader memoization hands out for DataFrames. The arrays are shared and read-only.
+        return Sketches(self.cells.copy(deep=deep), self.registers, self.times, self.coordinates, self.weights)
+
+    def take(self, positions):
+        # Sketches of the cells at the given positions.
+        return Sketches(self.cells.take(positions).reset_index(drop=True), self.registers[positions],
+                        self.times[positions], {col: means[positions] for col, means in self.coordinates.items()},
+                        {col: weights[positions] for col, weights in self.weights.items()})
+
+
+def _hll_update(codes, ids, cells):
+    # Registers of each cell: the register is picked by the first HLL_PRECISION bits of the hashed driver ID, and
+    # keeps the longest run of leading zeros (plus one) seen in the remaining bits.
+    registers = np.zeros((cells, 2 ** HLL_PRECISION), dtype=np.uint8)
+    categories = ids.cat.categories if hasattr(ids, 'cat') else None
+    if categories is not None:
+        # Each distinct ID is hashed once.
+        id_codes = ids.cat.codes.to_numpy()
+        present = id_codes >= 0
+        hashes = pd.util.hash_array(np.asarray(categories, dtype=object))[id_codes[present]]
+    else:
+        present = ids.notna().to_numpy()
+        hashes = pd.util.hash_array(ids[present].to_numpy(dtype=object))
+    index = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.int64)
+    rest = hashes << np.uint64(HLL_PRECISION)
+    # Bit length of the remaining bits from the float exponent: rest = f * 2 ** e with 0.5 <= f < 1.
+    bits = np.frexp(rest.astype(np.float64))[1]
+    rank = np.where(rest == 0, 64 - HLL_PRECISION + 1, 64 - bits + 1).astype(np.uint8)
+    np.maximum.at(registers, (codes[present], index), rank)
+    return registers
+
+
+def _histogram(codes, bins, cells, size):
+    # Counts of every (cell, bin) pair, rows without a bin (bins < 0) are left out.
+    present = bins >= 0
+    counts = np.bincount(codes[present] * size + bins[present], minlength=cells * size)
+    return counts.reshape(cells, size).astype(np.int32)
+
+
+def _digest(codes, means, weights, groups):
+    # t-digests of `groups` groups from weighted values (single orders, or the centroids of the digests to merge):
+    # the values of each group are sorted, and those whose rank midpoint falls in the same 1 / CENTROIDS of its
+    # weight become one centroid. Groups with at most CENTROIDS orders keep every value.
+    present = (weights > 0) & ~np.isnan(means)
+    codes, means, weights = codes[present], means[present], weights[present]
+    order = np.lexsort((means, codes))
+    codes, means, weights = codes[order], means[order], weights[order]
+    totals = np.bincount(codes, weights=weights, minlength=groups)
+    cumulative = np.cumsum(weights)
+    before = np.concatenate([[0], np.cumsum(totals)])[codes]
+    midpoints = cumulative - before - weights / 2
+    slots = np.minimum((midpoints * CENTROIDS / totals[codes]).astype(np.int64), CENTROIDS - 1)
+    index = codes * CENTROIDS + slots
+    counts = np.bincount(index, weights=weights, minlength=groups * CENTROIDS)
+    sums = np.bincount(index, weights=weights * means, minlength=groups * CENTROIDS)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        centroids = np.where(counts > 0, sums / counts, np.nan)
+    # Empty slots are moved last, so each row stays sorted by mean.
+    centroids = centroids.reshape(groups, CENTROIDS)
+    counts = counts.reshape(groups, CENTROIDS)
+    moved = np.argsort(counts == 0, axis=1, kind='stable')
+    return np.take_along_axis(centroids, moved, axis=1), np.take_along_axis(counts, moved, axis=1).astype(np.int32)
+
+
+def build_sketches(df1):
+    """
+        Sketches the orders per cell of SKETCH_DIMENSIONS.
+
+        Parameters:
+            df1 (DataFrame): Cleaned orders with the COLUMNS columns.
+        Returns:
+            Sketches: One cell per combination of SKETCH_DIMENSIONS present in df1, sorted by the dimensions.
+    """
+    grouped = df1.loc[:, SKETCH_DIMENSIONS].groupby(SKETCH_DIMENSIONS, observed=True, dropna=False)
+    codes = grouped.ngroup().to_numpy()
+    cells = grouped.size().index.to_frame(index=False)
+
+    minutes = df1['Time_taken(min)'].to_numpy(dtype='float64')
+    minutes = np.where(np.isnan(minutes), -1, np.clip(minutes, 0, TIME_BINS - 1)).astype(np.int64)
+    coordinates = {}
+    weights = {}
+    for col in COORDINATES:
+        values = df1[col].to_numpy(dtype='float64')
+        coordinates[col], weights[col] = _digest(codes, values, np.ones(len(values)), len(cells))
+    return Sketches(cells, _hll_update(codes, df1['Delivery_person_ID'], len(cells)),
+                    _histogram(codes, minutes, len(cells), TIME_BINS), coordinates, weights)
+
+
+def combine_sketches(sketches, by=None):
+    """
+        Merges the cells sharing the same values of `by` into one cell, like curry_company.cube.combine_cells().
+
+        Parameters:
+            sketches (Sketches): Sketches to combine, usually filtered with filter_sketches().
+            by (list or Series): Columns of the cells, a key aligned with them (e.g. their week of the year), or None
+            for a single cell with everything.
+        Returns:
+            Sketches: One cell per group, sorted by `by`.
+    """
+    if by is None:
+        codes = np.zeros(len(sketches), dtype=np.int64)
+        cells = pd.DataFrame(index=range(1))
+    else:
+        grouped = sketches.cells.groupby(by, observed=True, dropna=False)
+        codes = grouped.ngroup().to_numpy()
+        cells = grouped.size().index.to_frame(index=False)
+    # Cells are gathered by group so each group is one contiguous run of rows. Reducing the runs one by one is much
+    # faster than ufunc.reduceat() along the rows when groups are few, e.g. dates or weeks, and groups of a single cell
+    # (most of them when merging) are copied at once.
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.diff(sorted_codes, prepend=-1))
+    stops = np.append(starts[1:], len(codes))
+    single = stops - starts == 1
+
+    def reduce(ufunc, arrays, dtype):
+        result = np.zeros((len(cells), arrays.shape[1]), dtype=dtype)
+        rows = arrays[order]
+        result[sorted_codes[starts[single]]] = rows[starts[single]]
+        for start, stop in zip(starts[~single].tolist(), stops[~single].tolist()):
+            result[sorted_codes[start]] = ufunc.reduce(rows[start:stop], axis=0)
+        return result
+
+    registers = reduce(np.maximum, sketches.registers, np.uint8)
+    times = reduce(np.add, sketches.times, np.int32)
+    coordinates = {}
+    weights = {}
+    for col, means in sketches.coordinates.items():
+        # Every centroid of the group's cells is an item of the group's digest.
+        coordinates[col], weights[col] = _digest(np.repeat(codes, CENTROIDS), means.ravel(),
+                                                 sketches.weights[col].ravel().astype('float64'), len(cells))
+    return Sketches(cells, registers, times, coordinates, weights)
+
+
+def merge_sketches(sketches, other):
+    # Combines two sketches, e.g. the current ones and the sketches of a new batch of orders.
+    cells = append_frames(sketches.cells, other.cells)
+    coordinates = {col: np.concatenate([means, other.coordinates[col]]) for col, means in sketches.coordinates.items()}
+    weights = {col: np.concatenate([counts, other.weights[col]]) for col, counts in sketches.weights.items()}
+    merged = Sketches(cells, np.concatenate([sketches.registers, other.registers]),
+                      np.concatenate([sketches.times, other.times]), coordinates, weights)
+    return combine_sketches(merged, SKETCH_DIMENSIONS)
+
+
+def filter_sketches(sketches, date_cutoff, traffic_options, weather_conditions, date_start=None):
+    # Same selection the pages apply to the orders, over the sketch cells (sorted by date, so it is a binary search).
+    cells = sketches.cells.assign(position=np.arange(len(sketches)))
+    selected = select_rows(cells, cells['Order_Date'], date_cutoff, traffic_options, weather_conditions, date_start)
+    return sketches.take(selected['position'].to_numpy())
+
+
+def _hll_estimate(registers):
+    # HyperLogLog estimate of each row of registers, with the linear counting correction for small cardinalities.
+    m = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype('float64')), axis=1)
+    zeros = (registers == 0).sum(axis=1)
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+def distinct_drivers(sketches, by=None):
+    """
+        Approximate number of distinct delivery drivers.
+
+        Parameters:
+            sketches (Sketches): Filtered sketches.
+            by (list or Series): Grouping, as in combine_sketches(), or None for the total.
+        Returns:
+            DataFrame or float: The `by` columns and 'Delivery_person_ID', the estimate of each group, or the total
+            estimate when by is None.
+    """
+    combined = combine_sketches(sketches, by)
+    estimates = _hll_estimate(combined.registers)
+    if by is None:
+        return float(estimates[0])
+    return combined.cells.assign(Delivery_person_ID=estimates)
+
+
+def _quantiles(counts, levels, lower, upper):
+    # Quantiles of each row of bin counts, interpolated linearly inside the bin [lower, upper) that holds them.
+    totals = counts.sum(axis=1)
+    cumulative = np.cumsum(counts, axis=1)
+    results = np.full((len(counts), len(levels)), np.nan)
+    for i, level in enumerate(levels):
+        target = level * totals
+        bins = np.minimum((cumulative < target[:, None]).sum(axis=1), counts.shape[1] - 1)
+        rows = np.arange(len(counts))
+        before = np.where(bins > 0, cumulative[rows, np.maximum(bins - 1, 0)], 0)
+        inside = counts[rows, bins]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(inside > 0, (target - before) / inside, 0)
+        results[:, i] = np.where(totals > 0, lower[bins] + fraction * (upper[bins] - lower[bins]), np.nan)
+    return results
+
+
+def time_quantiles(sketches, by=None, levels=(0.5, 0.9, 0.99)):
+    """
+        Delivery time quantiles of each group, from the per-minute histograms.
+
+        Parameters:
+            sketches (Sketches): Filtered sketches.
+            by (list or Series): Grouping, as in combine_sketches(), or None for the total.
+            levels (tuple): Quantile levels between 0 and 1.
+        Returns:
+            DataFrame: The `by` columns and one 'p<level>' column per level (e.g. 'p50'), in minutes: the exact
+            quantiles of the orders, as np.percentile(..., method='inverted_cdf').
+    """
+    combined = combine_sketches(sketches, by)
+    minutes = np.arange(TIME_BINS, dtype='float64')
+    # Each bin holds a single value, so the interpolation inside it is not used.
+    values = _quantiles(combined.times, levels, minutes, minutes)
+    columns = {'p{:g}'.format(level * 100): values[:, i] for i, level in enumerate(levels)}
+    return combined.cells.assign(**columns)
+
+
+def _digest_median(means, weights):
+    # Median of a digest: interpolated between the means of the centroids around half its weight, each centroid
+    # standing at the midpoint of the ranks it holds. Exact when every centroid holds a single order.
+    present = weights > 0
+    if not present.any():
+        return np.nan
+    means, weights = means[present], weights[present]
+    midpoints = np.cumsum(weights) - weights / 2
+    return float(np.interp(weights.sum() / 2, midpoints, means))
+
+
+def coordinate_medians(sketches, by):
+    # Approximate median of each coordinate column per group, e.g. the central locations of the maps.
+    combined = combine_sketches(sketches, by)
+    df_aux = combined.cells.copy()
+    for col, means in combined.coordinates.items():
+        df_aux[col] = [_digest_median(row, counts) for row, counts in zip(means, combined.weights[col])]
+    return df_aux
@@ -0,0 +1,140 @@
+# Libraries:
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from plotly.basedatatypes import BaseFigure
+
+from curry_company.filters import filter_key
+from curry_company.loader import dataset_version
+
+MANIFEST = 'manifest.json'
+
+
+def snapshots_dir(path):
+    # Pre-rendered reports are stored next to the dataset: dataset/train.csv -> dataset/train.snapshots/
+    return os.path.splitext(path)[0] + '.snapshots'
+
+
+def spec_to_json(spec):
+    # JSON form of a FilterSpec, with sorted options so equal selections give equal documents. The start date is only
+    # written when set, so selections without one keep their snapshot directory.
+    document = {'date_cutoff': spec.date_cutoff.isoformat(), 'traffic_options': sorted(spec.traffic_options),
+                'weather_conditions': sorted(spec.weather_conditions)}
+    if spec.date_start is not None:
+        document['date_start'] = spec.date_start.isoformat()
+    return document
+
+
+def spec_from_json(preset):
+    return filter_key(pd.Timestamp(preset['date_cutoff']), preset['traffic_options'], preset['weather_conditions'],
+                      preset.get('date_start'))
+
+
+def snapshot_dir(view, spec, path):
+    digest = hashlib.sha1(json.dumps(spec_to_json(spec), sort_keys=True).encode()).hexdigest()[:16]
+    return os.path.join(snapshots_dir(path), digest, view)
+
+
+def snapshot_stamp(view, spec, path):
+    # Modification time of the manifest of a snapshot, or None when there is none yet: a snapshot written (or
+    # rewritten) later gets another stamp, so lookups keyed by it are not answered by an earlier miss.
+    try:
+        return os.stat(os.path.join(snapshot_dir(view, spec, path), MANIFEST)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _version(path):
+    # Dataset version as stored in the manifests, JSON has no tuples.
+    return json.loads(json.dumps(dataset_version(path)))
+
+
+def _encode(value, directory, name):
+    # Writes figures as Plotly JSON and tables as Parquet next to the manifest, and describes everything else inline.
+    if isinstance(value, BaseFigure):
+        with open(os.path.join(directory, name + '.json'), 'w') as file:
+            file.write(value.to_json())
+        return {'figure': name + '.json'}
+    if isinstance(value, pd.DataFrame):
+        value.to_parquet(os.path.join(directory, name + '.parquet'))
+        return {'frame': name + '.parquet'}
+    if isinstance(value, pd.Series):
+        value.to_frame('values').to_parquet(os.path.join(directory, name + '.parquet'))
+        return {'series': name + '.parquet', 'name': value.name}
+    if isinstance(value, dict):
+        return {'dict': {key: _encode(item, directory, '{}.{}'.format(name, key)) for key, item in value.items()}}
+    if isinstance(value, (tuple, list)):
+        return {'tuple': [_encode(item, directory, '{}.{}'.format(name, i)) for i, item in enumerate(value)]}
+    if isinstance(value, np.generic):
+        value = value.item()
+    return {'value': value}
+
+
+def _decode(entry, directory):
+    if 'figure' in entry:
+        with open(os.path.join(directory, entry['figure'])) as file:
+            return pio.from_json(file.read())
+    if 'frame' in entry:
+        return pd.read_parquet(os.path.join(directory, entry['frame']))
+    if 'series' in entry:
+        return pd.read_parquet(os.path.join(directory, entry['series']))['values'].rename(entry['name'])
+    if 'dict' in entry:
+        return {key: _decode(item, directory) for key, item in entry['dict'].items()}
+    if 'tuple' in entry:
+        return tuple(_decode(item, directory) for item in entry['tuple'])
+    return entry['value']
+
+
+def write_snapshot(view, spec, outputs, path):
+    """
+        Stores the outputs of a view computed for one selection of the dataset.
+
+        Parameters:
+            view (str): Name of the view, see curry_company.reports.VIEWS.
+            spec (FilterSpec): The selection the outputs were computed for.
+            outputs (dict): Output name -> value, DataFrame, Series, Plotly figure, or a dict or tuple of them.
+            path (str): Path of the raw CSV file of the dataset.
+        Returns:
+            str: Directory of the snapshot.
+    """
+    target = snapshot_dir(view, spec, path)
+    # Written to a temporary directory and swapped in, so readers never see a half-written snapshot.
+    tmp = '{}.{}.tmp'.format(target, os.getpid())
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    entries = {name: _encode(value, tmp, name) for name, value in outputs.items()}
+    manifest = {'view': view, 'spec': spec_to_json(spec), 'version': _version(path), 'outputs': entries}
+    with open(os.path.join(tmp, MANIFEST), 'w') as file:
+        json.dump(manifest, file)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return target
+
+
+def read_snapshot(view, spec, path):
+    """
+        Loads the stored outputs of a view for a selection, if they were pre-rendered from the current dataset.
+
+        Parameters:
+            view (str): Name of the view.
+            spec (FilterSpec): The selection.
+            path (str): Path of the raw CSV file of the dataset.
+        Returns:
+            dict: Output name -> value as written by write_snapshot(), or None when there is no snapshot of this
+            selection or it was rendered from an older version of the dataset (or batches were ingested since).
+    """
+    directory = snapshot_dir(view, spec, path)
+    try:
+        with open(os.path.join(directory, MANIFEST)) as file:
+            manifest = json.load(file)
+        if manifest['version'] != _version(path):
+            return None
+        return {name: _decode(entry, directory) for name, entry in manifest['outputs'].items()}
+    except (OSError, ValueError):
+        # Missing, being replaced or unreadable: the pages compute the outputs instead.
+        return None
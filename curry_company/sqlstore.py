@@ -0,0 +1,286 @@
+# Libraries:
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import pandas as pd
+
+from curry_company import storage
+from curry_company.cleaning import SCHEMA, index_by_date
+from curry_company.instrumentation import stage
+from curry_company.loader import DATASET_PATH, dataset_version, iter_dataset
+
+# Query backend of the pages, picked with CURRY_COMPANY_BACKEND:
+#   pandas (default)  every worker process loads the cleaned orders and the cube in memory and filters them there,
+#                     see curry_company.loader
+#   sqlite            the cleaned orders live in one SQLite file next to the CSV, shared by every worker. Selections
+#                     are queries with the filters pushed down: a worker only holds the orders and cells it selected.
+BACKENDS = ['pandas', 'sqlite']
+BACKEND = os.environ.get('CURRY_COMPANY_BACKEND') or 'pandas'
+if BACKEND not in BACKENDS:
+    raise ValueError('CURRY_COMPANY_BACKEND must be one of {}, not {!r}'.format(BACKENDS, BACKEND))
+
+# SQLite types of the cleaned dtypes (see curry_company.cleaning.SCHEMA), integers otherwise. Dates are stored as
+# nanoseconds since the epoch, as pandas keeps them, so they are compared and converted back without parsing.
+SQL_TYPES = {'category': 'TEXT', 'object': 'TEXT', 'float64': 'REAL', 'datetime64[ns]': 'INTEGER'}
+
+# Database path -> (dataset version it was last brought up to date with by this process, dtype of each column).
+_versions = {}
+_lock = threading.Lock()
+
+
+def database_path(path):
+    # The database sits next to the CSV, like the Parquet cache: dataset/train.csv -> dataset/train.sqlite
+    return os.path.splitext(path)[0] + '.sqlite'
+
+
+def _column(name):
+    # Quoted identifier: names like 'Time_taken(min)' are not plain SQL names.
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def _version(path):
+    # Dataset version as stored in the database, JSON has no tuples.
+    return json.loads(json.dumps(dataset_version(path)))
+
+
+def _rows(df1, dtypes):
+    # Rows of cleaned orders as SQLite values: categories as text, dates as integers, missing values as NULL.
+    data = []
+    for col, dtype in dtypes.items():
+        values = df1[col]
+        if dtype == 'datetime64[ns]':
+            column = values.to_numpy().view('int64').astype(object)
+        else:
+            column = values.to_numpy(dtype=object)
+        column[values.isna().to_numpy()] = None
+        data.append(column.tolist())
+    return zip(*data)
+
+
+def _insert(conn, df1, dtypes):
+    with stage('insert_orders', rows_in=len(df1)):
+        sql = 'INSERT INTO orders VALUES ({})'.format(', '.join('?' * len(dtypes)))
+        conn.executemany(sql, _rows(df1, dtypes))
+
+
+def _create_tables(conn, dtypes):
+    cols = ['{} {}'.format(_column(col), SQL_TYPES.get(dtype, 'INTEGER')) for col, dtype in dtypes.items()]
+    conn.execute('CREATE TABLE orders ({})'.format(', '.join(cols)))
+    conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+
+
+def _write_meta(conn, version, dtypes):
+    conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                     [('version', json.dumps(version)), ('schema', json.dumps(SCHEMA, sort_keys=True)),
+                      ('dtypes', json.dumps(dtypes))])
+
+
+def build_database(path=DATASET_PATH):
+    """
+        Writes the cleaned orders of the dataset (and its ingested batches) into the SQLite database next to the CSV.
+
+        The orders are streamed chunk by chunk from the Parquet cache, and indexed by date. The database is written to
+        a temporary file and renamed, so workers querying the previous one are not disturbed.
+
+        Parameters:
+            path (str): Path of the raw CSV file.
+        Returns:
+            str: Path of the database.
+    """
+    target = database_path(path)
+    tmp = '{}.{}.tmp'.format(target, os.getpid())
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    version = _version(path)
+    dtypes = None
+    with closing(sqlite3.connect(tmp)) as conn:
+        with conn:
+            for chunk in iter_dataset(path):
+                if dtypes is None:
+                    # Every cleaned column is stored, with the dtypes of the first chunk.
+                    dtypes = {col: str(dtype) for col, dtype in chunk.dtypes.items()}
+                    _create_tables(conn, dtypes)
+                _insert(conn, chunk, dtypes)
+            if version[1]:
+                _insert(conn, storage.read_batches(path, version[1]), dtypes)
+            # Index entries are sorted by date, then insertion order: a date range is read in the order of the orders
+            # loaded by curry_company.loader, without sorting.
+            conn.execute('CREATE INDEX orders_date ON orders ("Order_Date")')
+            _write_meta(conn, version, dtypes)
+    os.replace(tmp, target)
+    return target
+
+
+def _read_meta(target):
+    # Version of the dataset the database holds and the dtypes of its columns, or None when it is missing or was
+    # written under another SCHEMA.
+    if not os.path.exists(target):
+        return None
+    try:
+        with closing(sqlite3.connect('file:{}?mode=ro'.format(target), uri=True)) as conn:
+            meta = dict(conn.execute('SELECT key, value FROM meta').fetchall())
+    except sqlite3.Error:
+        return None
+    if meta.get('schema') != json.dumps(SCHEMA, sort_keys=True):
+        return None
+    return json.loads(meta['version']), json.loads(meta['dtypes'])
+
+
+def _extend_database(path, target, version, dtypes):
+    # Inserts the batches ingested since the database was written, once: a worker that finds them already inserted
+    # by another one (inside the same write transaction) leaves them.
+    with closing(sqlite3.connect(target, isolation_level=None)) as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            stored = json.loads(conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0])
+            if len(stored[1]) < len(version[1]):
+                _insert(conn, storage.read_batches(path, version[1][len(stored[1]):]), dtypes)
+                _write_meta(conn, version, dtypes)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+
+def _ensure(path):
+    # Brings the database up to date with the dataset, the way curry_company.loader keeps its memoized frames: a new
+    # or edited CSV rebuilds it, new batches are appended. Returns the dtypes of its columns.
+    target = database_path(path)
+    version = _version(path)
+    with _lock:
+        if target not in _versions or _versions[target][0] != version:
+            meta = _read_meta(target)
+            if meta is None or meta[0][0] != version[0] or meta[0][1] != version[1][:len(meta[0][1])]:
+                build_database(path)
+                meta = _read_meta(target)
+            elif len(meta[0][1]) < len(version[1]):
+                _extend_database(path, target, version, meta[1])
+            _versions[target] = (version, meta[1])
+        return _versions[target][1]
+
+
+def _connect(path):
+    # Read-only connection to the database, one per query so any thread can query. Call _ensure() first.
+    return closing(sqlite3.connect('file:{}?mode=ro'.format(database_path(path)), uri=True))
+
+
+def _where(spec):
+    # WHERE clause and parameters of a selection (see curry_company.filters.FilterSpec).
+    date_cutoff, traffic_options, weather_conditions, date_start = spec
+    clauses = ['"Order_Date" < ?']
+    params = [pd.Timestamp(date_cutoff).value]
+    if date_start is not None:
+        clauses.append('"Order_Date" >= ?')
+        params.append(pd.Timestamp(date_start).value)
+    for col, options in [('Road_traffic_density', traffic_options), ('Weatherconditions', weather_conditions)]:
+        options = sorted(options)
+        clauses.append('{} IN ({})'.format(_column(col), ', '.join('?' * len(options))))
+        params += options
+    return ' AND '.join(clauses), params
+
+
+def _restore(df1, dtypes):
+    # Back to the dtypes the columns had in pandas. Integer columns with missing values stay float, as in a pandas
+    # aggregation.
+    for col, dtype in dtypes.items():
+        values = df1[col]
+        if dtype == 'datetime64[ns]':
+            df1[col] = values.to_numpy(dtype='int64').view('datetime64[ns]')
+        elif dtype == 'category':
+            df1[col] = values.astype('category')
+        elif dtype != 'object' and not values.isna().any():
+            df1[col] = values.astype(dtype)
+    return df1
+
+
+def query_orders(spec, columns=None, path=DATASET_PATH):
+    """
+        Orders matching a selection, read from the database with the filters pushed down to its date index.
+
+        Parameters:
+            spec (FilterSpec): The selection, see curry_company.filters.filter_key().
+            columns (list): Order columns to read, or None for all of them.
+            path (str): Path of the raw CSV file.
+        Returns:
+            DataFrame: The selected orders, sorted and indexed by date like those of curry_company.loader.
+    """
+    dtypes = _ensure(path)
+    columns = list(dtypes) if columns is None else list(columns)
+    where, params = _where(spec)
+    sql = 'SELECT {} FROM orders WHERE {} ORDER BY "Order_Date", rowid'.format(', '.join(map(_column, columns)),
+                                                                              where)
+    with _connect(path) as conn:
+        df1 = pd.read_sql_query(sql, conn, params=params)
+    df1 = _restore(df1, {col: dtypes[col] for col in columns})
+    return index_by_date(df1) if 'Order_Date' in columns else df1
+
+
+def query_cells(spec, dimensions, measures, path=DATASET_PATH):
+    """
+        Cube cells of the orders matching a selection, aggregated by the database: the same cells as
+        curry_company.cube.build_cube() followed by filter_cube(), without loading the orders.
+
+        Parameters:
+            spec (FilterSpec): The selection, see curry_company.filters.filter_key().
+            dimensions (list): Grouping columns, e.g. curry_company.cube.DIMENSIONS.
+            measures (list): Numeric columns summarized in each cell.
+            path (str): Path of the raw CSV file.
+        Returns:
+            DataFrame: Cells with the columns of build_cube(), sorted by the dimensions.
+    """
+    columns = _ensure(path)
+    keys = ', '.join(map(_column, dimensions))
+    aggregations = ['COUNT(*) AS "count"']
+    dtypes = {col: columns[col] for col in dimensions}
+    dtypes['count'] = 'int64'
+    for col in measures:
+        value = _column(col)
+        names = {suffix: _column(col + suffix) for suffix in ('_count', '_sum', '_sumsq', '_min', '_max')}
+        # TOTAL() is 0.0 over missing values only, like a pandas sum.
+        aggregations += ['COUNT({}) AS {}'.format(value, names['_count']),
+                         'TOTAL({}) AS {}'.format(value, names['_sum']),
+                         'TOTAL({0} * {0}) AS {1}'.format(value, names['_sumsq']),
+                         'MIN({}) AS {}'.format(value, names['_min']),
+                         'MAX({}) AS {}'.format(value, names['_max'])]
+        dtypes.update({col + '_count': 'int64', col + '_sum': 'float64', col + '_sumsq': 'float64',
+                       col + '_min': columns[col], col + '_max': columns[col]})
+    where, params = _where(spec)
+    sql = 'SELECT {0}, {1} FROM orders WHERE {2} GROUP BY {0} ORDER BY {0}'.format(keys, ', '.join(aggregations),
+                                                                                  where)
+    with _connect(path) as conn:
+        cube = pd.read_sql_query(sql, conn, params=params)
+    return _restore(cube, dtypes)
+
+
+def query_weekly_drivers(spec, path=DATASET_PATH):
+    """
+        Distinct delivery drivers of each week of the year among the orders matching a selection, counted by the
+        database: the same counts as curry_company.driver_tables.weekly_drivers(), without loading the orders.
+
+        Parameters:
+            spec (FilterSpec): The selection, see curry_company.filters.filter_key().
+            path (str): Path of the raw CSV file.
+        Returns:
+            DataFrame: 'week_of_year' ('%U' strings, see curry_company.cube.week_of_year()) and the number of
+            drivers 'Delivery_person_ID', sorted by week.
+    """
+    _ensure(path)
+    # SQLite has no '%U': it is (day of the year - 1 + 7 - day of the week, Sunday being 0) // 7.
+    day = 'DATE("Order_Date" / 1000000000, \'unixepoch\')'
+    week = "PRINTF('%02d', (CAST(STRFTIME('%j', {0}) AS INTEGER) + 6 - CAST(STRFTIME('%w', {0}) AS INTEGER)) / 7)"
+    where, params = _where(spec)
+    sql = ('SELECT {} AS "week_of_year", COUNT(DISTINCT "Delivery_person_ID") AS "Delivery_person_ID" FROM orders '
+           'WHERE {} GROUP BY 1 ORDER BY 1'.format(week.format(day), where))
+    with _connect(path) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+def query_dates(path=DATASET_PATH):
+    # First and last order dates, read from the date index.
+    _ensure(path)
+    with _connect(path) as conn:
+        first, last = conn.execute('SELECT MIN("Order_Date"), MAX("Order_Date") FROM orders').fetchone()
+    return pd.Timestamp(first).to_pydatetime(), pd.Timestamp(last).to_pydatetime()
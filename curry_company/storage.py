@@ -0,0 +1,223 @@
+# Libraries:
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from curry_company.cleaning import SCHEMA, clean_code, concat_frames, sort_categories
+from curry_company.instrumentation import stage
+
+# Stored in the Parquet metadata, so a cache written under a different SCHEMA is rebuilt.
+SCHEMA_KEY = b'curry_company.schema'
+
+# Raw CSV rows parsed and cleaned at a time when building the cache, and cached rows read at a time when streaming it:
+# peak memory depends on this, not on the size of the file.
+CHUNK_ROWS = 100_000
+
+# (CSV path, modification time, size) -> signature of its contents, see extract_signature().
+_signatures = {}
+
+
+def cache_path(path):
+    # The cleaned dataset is cached next to its CSV: dataset/train.csv -> dataset/train.parquet
+    return os.path.splitext(path)[0] + '.parquet'
+
+
+def is_fresh(path):
+    # The cache is usable when it exists, was written with the current SCHEMA and is not older than the CSV.
+    # Deployments that ship only the cache (no CSV) read it as-is.
+    cache = cache_path(path)
+    if not os.path.exists(cache):
+        return False
+    metadata = pq.read_schema(cache).metadata or {}
+    if metadata.get(SCHEMA_KEY) != _schema_fingerprint():
+        return False
+    if not os.path.exists(path):
+        return True
+    return os.stat(cache).st_mtime_ns >= os.stat(path).st_mtime_ns
+
+
+def _schema_fingerprint():
+    return json.dumps(SCHEMA, sort_keys=True).encode()
+
+
+def read_cache(path, columns=None):
+    """
+        Reads the cleaned dataset from its Parquet cache.
+
+        Parameters:
+            path (str): Path of the raw CSV file the cache was built from.
+            columns (list): Columns to read, or None for all of them.
+        Returns:
+            DataFrame: The cleaned dataframe, with the dtypes declared in curry_company.cleaning.SCHEMA.
+    """
+    return sort_categories(pd.read_parquet(cache_path(path), columns=columns, memory_map=True))
+
+
+def iter_cache(path, columns=None, chunksize=CHUNK_ROWS):
+    # Streams the cleaned dataset from its Parquet cache, chunksize rows at a time.
+    cache = pq.ParquetFile(cache_path(path), memory_map=True)
+    for batch in cache.iter_batches(batch_size=chunksize, columns=columns):
+        yield sort_categories(batch.to_pandas())
+
+
+def read_chunks(path, chunksize=CHUNK_ROWS):
+    # Streams the raw CSV, cleaning every chunk with clean_code(). Row labels keep counting across chunks.
+    chunks = pd.read_csv(path, chunksize=chunksize)
+    while True:
+        with stage('read_csv') as timing:
+            raw = next(chunks, None)
+            timing['rows_out'] = None if raw is None else len(raw)
+        if raw is None:
+            return
+        with stage('clean_code', rows_in=len(raw)) as timing:
+            df1 = clean_code(raw)
+            timing['rows_out'] = len(df1)
+        yield df1
+
+
+def _arrow_type(dtype):
+    # Arrow type of a cleaned dtype. Categorical columns are stored with 32-bit dictionary indices, so frames whose
+    # categories (and thus codes width) differ share one type.
+    if dtype == 'category':
+        return pa.dictionary(pa.int32(), pa.string())
+    if dtype == 'object':
+        return pa.string()
+    return pa.from_numpy_dtype(np.dtype(dtype))
+
+
+def _arrow_schema(df1):
+    # Schema of the file, declared by SCHEMA rather than inferred from the first frame: cleaning may leave that frame
+    # without rows, and its text columns without a type. Columns outside SCHEMA are text, as read from the CSV. Row
+    # labels are always stored, so every frame has the same columns.
+    table = pa.Table.from_pandas(df1.iloc[:0], preserve_index=True)
+    fields = [pa.field(field.name, _arrow_type(SCHEMA.get(field.name, 'object'))) if field.name in df1.columns
+              else field for field in table.schema]
+    return pa.schema(fields, metadata={**table.schema.metadata, SCHEMA_KEY: _schema_fingerprint()})
+
+
+def _write_parquet(frames, target):
+    # Writes the frames one after the other as row groups of the same file, or an empty file with the SCHEMA columns
+    # when there are none. Written to a temporary file and renamed, so concurrent workers never read a half-written
+    # file.
+    tmp = '{}.{}.tmp'.format(target, os.getpid())
+    writer = None
+    rows = 0
+    try:
+        for df1 in frames:
+            if writer is None:
+                schema = _arrow_schema(df1)
+                writer = pq.ParquetWriter(tmp, schema)
+            writer.write_table(pa.Table.from_pandas(df1, schema=schema, preserve_index=True))
+            rows += len(df1)
+        if writer is None:
+            writer = pq.ParquetWriter(tmp, _arrow_schema(pd.DataFrame({col: pd.Series(dtype=dtype)
+                                                                       for col, dtype in SCHEMA.items()})))
+        writer.close()
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            os.remove(tmp)
+        raise
+    os.replace(tmp, target)
+    return rows
+
+
+def write_cache(df1, path):
+    _write_parquet([df1], cache_path(path))
+
+
+def batches_dir(path):
+    # Batches ingested after the CSV are stored as Parquet parts: dataset/train.csv -> dataset/train.batches/
+    return os.path.splitext(path)[0] + '.batches'
+
+
+def extract_signature(path):
+    """
+        Identifies the contents of the raw CSV, whatever its modification time: a `touch` or a checkout of the same
+        file keeps its signature, a new extract gets another one.
+
+        The file is hashed once per process for each (modification time, size) it is seen with.
+
+        Parameters:
+            path (str): Path of the raw CSV file.
+        Returns:
+            str: Hash of the file contents, or None when there is no CSV (deployments that ship only the cache).
+    """
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _signatures:
+        digest = hashlib.sha1()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        _signatures[key] = digest.hexdigest()[:16]
+    return _signatures[key]
+
+
+def list_batches(path):
+    # Names of the stored batches, oldest first. Only the batches ingested against the current extract are listed:
+    # replacing the CSV with a new extract means it already contains them.
+    directory = batches_dir(path)
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.endswith('.parquet'))
+    signature = extract_signature(path)
+    if signature is None:
+        return names
+    return [name for name in names if name[:-len('.parquet')].split('-')[3:] == [signature]]
+
+
+def write_batch(batch, path):
+    # Part names start with the ingestion time, so sorting them gives the ingestion order, and end with the signature
+    # of the extract the batch was ingested against.
+    directory = batches_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    name = 'part-{:020d}-{}-{}.parquet'.format(time.time_ns(), os.getpid(), extract_signature(path) or 'none')
+    _write_parquet([batch], os.path.join(directory, name))
+    return name
+
+
+def read_batches(path, names, columns=None):
+    """
+        Reads stored batches and appends them into one frame.
+
+        Parameters:
+            path (str): Path of the raw CSV file the batches belong to.
+            names (list): Batch names, as returned by list_batches().
+            columns (list): Columns to read, or None for all of them.
+        Returns:
+            DataFrame: The cleaned orders of every batch, in ingestion order.
+    """
+    directory = batches_dir(path)
+    frames = [pd.read_parquet(os.path.join(directory, name), columns=columns, memory_map=True) for name in names]
+    return concat_frames(frames)
+
+
+def build_cache(path, chunksize=CHUNK_ROWS):
+    """
+        Ingest step: streams the CSV in chunks, cleans each of them and appends it to the typed cache next to the CSV.
+
+        Only one chunk is held in memory at a time, so files larger than memory can be ingested.
+
+        Parameters:
+            path (str): Path of the raw CSV file.
+            chunksize (int): Raw rows per chunk.
+        Returns:
+            int: Number of cleaned orders written.
+    """
+    return _write_parquet(read_chunks(path, chunksize), cache_path(path))
+
+
+if __name__ == '__main__':
+    # python -m curry_company.storage [dataset/train.csv]
+    from curry_company.loader import DATASET_PATH
+    build_cache(sys.argv[1] if len(sys.argv) > 1 else DATASET_PATH)
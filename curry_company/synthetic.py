@@ -0,0 +1,83 @@
+# Libraries:
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Raw values as they appear in dataset/train.csv, trailing spaces and 'NaN ' markers included.
+CITIES = ['Metropolitian ', 'Urban ', 'Semi-Urban ']
+TRAFFIC = ['Low ', 'Medium ', 'High ', 'Jam ']
+WEATHER = ['Cloudy', 'Fog', 'Sandstorms', 'Stormy', 'Sunny', 'Windy']
+ORDER_TYPES = ['Snack ', 'Meal ', 'Drinks ', 'Buffet ']
+VEHICLES = ['motorcycle ', 'scooter ', 'electric_scooter ']
+FIRST_DATE, LAST_DATE = '2022-02-11', '2022-04-06'
+
+# Share of missing values written in the raw columns that clean_code() filters on.
+MISSING_RATE = 0.02
+
+
+def _pick(rng, values, n, missing=0.0, missing_value='NaN '):
+    # Draws n values, replacing a share `missing` of them by the raw missing marker. Values are drawn as codes into
+    # the (small) array of distinct values, so large datasets never build a Python string per row.
+    values = np.asarray(list(values) + [missing_value], dtype=object)
+    codes = rng.integers(0, len(values) - 1, n)
+    if missing:
+        codes[rng.random(n) < missing] = len(values) - 1
+    return values.take(codes)
+
+
+def _times(*minutes):
+    # Raw 'HH:MM:SS' times of the day, from 08:00 to 23:59 at the given minutes of every hour.
+    return ['{:02d}:{:02d}:00'.format(hour, minute) for hour in range(8, 24) for minute in minutes]
+
+
+def generate_orders(n, seed=0, drivers=None):
+    """
+        Generates raw delivery orders with the columns and value formats of dataset/train.csv.
+
+        Parameters:
+            n (int): Number of orders.
+            seed (int): Seed of the random generator, the same seed always gives the same dataset.
+            drivers (int): Number of distinct delivery drivers, or None for about one per 35 orders as in the original
+            extract.
+        Returns:
+            DataFrame: Raw orders, ready for clean_code() or to be written with to_csv(index=False).
+    """
+    rng = np.random.default_rng(seed)
+    drivers = drivers or max(50, n // 35)
+
+    driver_ids = ['CITY{:02d}RES{:02d}DEL{:02d} '.format(i % 60, i // 60 % 20, i // 1200 + 1) for i in range(drivers)]
+    dates = pd.date_range(FIRST_DATE, LAST_DATE).strftime('%d-%m-%Y')
+    restaurant_latitude = rng.uniform(10, 31, n).round(6)
+    restaurant_longitude = rng.uniform(72, 88, n).round(6)
+
+    df1 = pd.DataFrame({
+        'ID': np.char.add(np.char.mod('0x%x', np.arange(n)), ' ').astype(object),
+        'Delivery_person_ID': _pick(rng, driver_ids, n),
+        'Delivery_person_Age': _pick(rng, map(str, range(18, 40)), n, MISSING_RATE),
+        'Delivery_person_Ratings': _pick(rng, map(str, np.arange(25, 51) / 10), n, MISSING_RATE),
+        'Restaurant_latitude': restaurant_latitude,
+        'Restaurant_longitude': restaurant_longitude,
+        'Delivery_location_latitude': restaurant_latitude + rng.uniform(0.01, 0.2, n).round(6),
+        'Delivery_location_longitude': restaurant_longitude + rng.uniform(0.01, 0.2, n).round(6),
+        'Order_Date': _pick(rng, dates, n),
+        'Time_Orderd': _pick(rng, _times(0, 15, 30, 45), n, MISSING_RATE),
+        'Time_Order_picked': _pick(rng, _times(5, 20, 35, 50), n),
+        'Weatherconditions': _pick(rng, ['conditions ' + weather for weather in WEATHER], n, MISSING_RATE,
+                                   'conditions NaN'),
+        'Road_traffic_density': _pick(rng, TRAFFIC, n, MISSING_RATE),
+        'Vehicle_condition': rng.integers(0, 3, n),
+        'Type_of_order': _pick(rng, ORDER_TYPES, n),
+        'Type_of_vehicle': _pick(rng, VEHICLES, n),
+        'multiple_deliveries': _pick(rng, ['0', '1', '2', '3'], n, MISSING_RATE),
+        'Festival': _pick(rng, ['No '] * 49 + ['Yes '], n, MISSING_RATE),
+        'City': _pick(rng, CITIES, n, MISSING_RATE),
+        'Time_taken(min)': _pick(rng, ['(min) {}'.format(minutes) for minutes in range(10, 55)], n),
+    })
+    return df1
+
+
+if __name__ == '__main__':
+    # python -m curry_company.synthetic 100000 dataset/synthetic.csv [seed]
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    generate_orders(int(sys.argv[1]), seed=seed).to_csv(sys.argv[2], index=False)
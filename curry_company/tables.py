@@ -0,0 +1,50 @@
+# Libraries:
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def search_rows(df, column, text):
+    # Positions of the rows whose column contains the text (case-insensitive). On categorical columns the match is
+    # evaluated once per category instead of once per row.
+    if not text:
+        return np.arange(len(df))
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        matches = values.cat.categories.astype(str).str.contains(text, case=False, regex=False)
+        codes = values.cat.codes.to_numpy()
+        return np.flatnonzero((codes >= 0) & matches[codes])
+    return np.flatnonzero(values.astype(str).str.contains(text, case=False, regex=False).to_numpy())
+
+
+def sort_rows(df, positions, column, ascending=True):
+    # Reorders the positions by the column. Values are ranked into integers first, so the sort is a stable integer
+    # argsort whatever the column type, with missing values last in both directions.
+    keys, uniques = pd.factorize(df[column].to_numpy()[positions], sort=True)
+    keys = np.where(keys < 0, len(uniques), keys if ascending else len(uniques) - 1 - keys)
+    return positions[np.argsort(keys, kind='stable')]
+
+
+def paginate(df, page=1, page_size=20, sort_by=None, ascending=True, search=None, search_column=None):
+    """
+        Searches, sorts and slices a table, returning only the rows of the requested page.
+
+        Parameters:
+            df (DataFrame): The full table.
+            page (int): Page number, starting at 1. Out of range values are clipped.
+            page_size (int): Rows per page.
+            sort_by (str): Column to sort by, or None to keep the table order.
+            ascending (bool): Sort direction.
+            search (str): Text searched in search_column, or None/empty to keep every row.
+            search_column (str): Column searched.
+        Returns:
+            tuple: (page rows as a DataFrame, number of matching rows, number of pages)
+    """
+    positions = search_rows(df, search_column, search)
+    if sort_by is not None:
+        positions = sort_rows(df, positions, sort_by, ascending)
+    pages = max(1, math.ceil(len(positions) / page_size))
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    return df.take(positions[start:start + page_size]), len(positions), pages
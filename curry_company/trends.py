@@ -0,0 +1,68 @@
+# Libraries:
+import numpy as np
+import pandas as pd
+
+# Moving windows of the trend charts, in days.
+WINDOWS = [7, 28]
+
+
+def daily_totals(cube, measure='Time_taken(min)'):
+    """
+        Daily order counts and sums of a measure over a continuous calendar.
+
+        Parameters:
+            cube (DataFrame): A cube built by build_cube(), usually filtered with filter_cube().
+            measure (str): One of MEASURES.
+        Returns:
+            DataFrame: Indexed by every date from the first to the last order (days without orders are zeros), with
+            'orders', 'count', 'sum' and 'sumsq' of the measure.
+    """
+    cols = ['count', measure + '_count', measure + '_sum', measure + '_sumsq']
+    df_aux = cube.loc[:, ['Order_Date'] + cols].groupby('Order_Date').sum()
+    df_aux.columns = ['orders', 'count', 'sum', 'sumsq']
+    if df_aux.empty:
+        return df_aux
+    calendar = pd.date_range(df_aux.index.min(), df_aux.index.max(), freq='D', name='Order_Date')
+    return df_aux.reindex(calendar, fill_value=0)
+
+
+def _window_sums(values, window):
+    # Sum of each trailing window from prefix sums: every window costs one subtraction, whatever its length. Windows
+    # reaching before the first day are NaN.
+    totals = np.concatenate([[0.0], np.cumsum(values, dtype='float64')])
+    sums = totals[window:] - totals[:-window]
+    return np.concatenate([np.full(min(window - 1, len(values)), np.nan), sums])
+
+
+def rolling_trends(cube, windows=WINDOWS, measure='Time_taken(min)'):
+    """
+        Moving order counts, moving mean and standard deviation of a measure, and week-over-week growth.
+
+        Parameters:
+            cube (DataFrame): A cube built by build_cube(), usually filtered with filter_cube().
+            windows (list): Window lengths in days.
+            measure (str): One of MEASURES.
+        Returns:
+            DataFrame: Indexed by date, with 'orders_<w>d', 'mean_<w>d' and 'std_<w>d' for each window w, and
+            'wow_growth': the orders of the last 7 days over those of the 7 days before, minus one.
+    """
+    daily = daily_totals(cube, measure)
+    df_aux = pd.DataFrame(index=daily.index)
+    for window in windows:
+        orders = _window_sums(daily['orders'].to_numpy(), window)
+        count = _window_sums(daily['count'].to_numpy(), window)
+        total = _window_sums(daily['sum'].to_numpy(), window)
+        squares = _window_sums(daily['sumsq'].to_numpy(), window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / count
+            # Sample variance (ddof=1, as pandas) from the additive sums.
+            std = np.sqrt(np.maximum((squares - total * mean) / (count - 1), 0))
+        df_aux['orders_{}d'.format(window)] = orders
+        df_aux['mean_{}d'.format(window)] = mean
+        df_aux['std_{}d'.format(window)] = np.where(count > 1, std, np.nan)
+
+    weekly = pd.Series(_window_sums(daily['orders'].to_numpy(), 7), index=daily.index)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = weekly / weekly.shift(7) - 1
+    df_aux['wow_growth'] = growth.replace([np.inf, -np.inf], np.nan)
+    return df_aux
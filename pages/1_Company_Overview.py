@@ -1,174 +1,16 @@
 # Libraries:
-import plotly.express as px
-import pandas as pd
 import streamlit as st
 import datetime
-import folium
-from streamlit_folium import folium_static
+import streamlit.components.v1 as components
 from PIL import Image
+from curry_company import company, dataset_dates, filter_key, instrumentation
+from curry_company.maps import MAP_MODES
+from curry_company.reports import ViewResults
+from curry_company.sketches import APPROXIMATE
 
 st.set_page_config(page_title='Company  Overview', page_icon='📈', layout='wide')
-# =============================
-# Functions
-# =============================
-def country_maps(df1):
-    # Central location of each city by traffic type.
-    cols = ['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']
-    df_aux = (df1.loc[:, cols]
-              .groupby(['City', 'Road_traffic_density'])
-              .median()
-              .reset_index())
-
-    # Draw the map
-    map1 = folium.Map()
-
-    # Marker receives a list of latitude and longitude, and we add to the map created with add_to.
-    for index, location_info in df_aux.iterrows():
-        (folium.Marker([location_info['Delivery_location_latitude'],
-                       location_info['Delivery_location_longitude']],
-                      popup=location_info[['City', 'Road_traffic_density']]).add_to(map1))
-    folium_static(map1, width=1024, height=600)
-
-def orders_by_week_person(df1):
-    # Orders volume by week of the year.
-    df_aux01 = df1.loc[:, ['ID', 'week_of_year']].groupby('week_of_year').count().reset_index()
-    df_aux02 = (df1.loc[:, ['Delivery_person_ID', 'week_of_year']]
-                .groupby('week_of_year')
-                .nunique()
-                .reset_index())
-    df_aux = pd.merge(df_aux01, df_aux02, how='inner')
-    df_aux['order_by_delivery_driver'] = (df_aux['ID'] / df_aux['Delivery_person_ID']).round(0)
-
-    fig = px.line(df_aux, x='week_of_year', y='order_by_delivery_driver')
-    fig.update_layout(
-        xaxis_title="Week of the Year",
-        yaxis_title="Order by Delivery Driver"
-    )
-    return fig
-
-
-def orders_by_week(df1):
-    # In my dataset I don't have the week of the year column, so I need to create using %U(Sunday as first day of the
-    # week, %W is monday the first day of the week). But first I need to transform my df1['Order_Date'] that is a
-    # Series in a Data type.
-    df1['week_of_year'] = df1['Order_Date'].dt.strftime('%U')
-    df_aux = (df1.loc[:, ['ID', 'week_of_year']]
-              .groupby('week_of_year')
-              .count()
-              .reset_index()
-              .rename(columns={'ID': 'Number_of_Orders'}))
-
-    # Line chart - using Plotly
-    fig = px.line(df_aux, x='week_of_year', y='Number_of_Orders')
-    fig.update_layout(
-        xaxis_title="Week of the Year",
-        yaxis_title="Number of Orders"
-    )
-    return fig
-
-
-def orders_by_city_traffic(df1):
-    # Comparison of order volumes by city and traffic type.
-    df_aux = (df1.loc[:, ['ID', 'City', 'Road_traffic_density']]
-              .groupby(['City', 'Road_traffic_density'])
-              .count()
-              .reset_index()
-              .rename(columns={'ID': 'Number_of_Orders'}))
-    # Scatter plot
-    fig = px.scatter(df_aux, x='City', y='Road_traffic_density', size='Number_of_Orders', color='City')
-    fig.update_layout(
-        xaxis_title="City",
-        yaxis_title="Road Traffic Density"
-    )
-    return fig
-
-
-def orders_by_traffic(df1):
-    # Distribution of orders by type of traffic.
-    df_aux = (df1.loc[:, ['ID', 'Road_traffic_density']]
-              .groupby('Road_traffic_density')
-              .count()
-              .reset_index())
-    df_aux = df_aux.loc[df_aux['Road_traffic_density'] != 'NaN', :]
-    df_aux['%deliveries'] = (df_aux['ID'] / df_aux['ID'].sum()).round(2)
-
-    # Pie chart
-
-    fig = px.pie(df_aux, values='%deliveries', names='Road_traffic_density')
-
-    return fig
-
-
-def order_metric(df1):
-    # Distribution of orders in timeline.
-    # Select columns
-    cols = ['ID', 'Order_Date']
-    # Select lines
-    df_aux = (df1.loc[:, cols]
-              .groupby('Order_Date')
-              .count()
-              .reset_index()
-              .rename(columns={'ID': 'Number_of_Orders'}))
-    # Chart
-    fig = px.bar(df_aux, x='Order_Date', y='Number_of_Orders')
-    fig.update_layout(
-        xaxis_title="Order Date",
-        yaxis_title="Number of Orders"
-    )
-    return fig
-
-
-def clean_code(df1):
-    # Function to clean dataframe: removing "NaN", fixing data types, removing spaces within strings/text/object,
-    # formatting Data column, separating text from int column, remove 'condition' word
-    # Input: Dataframe and Output: Dataframe
-
-    selected_lines = df1['Delivery_person_Age'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
-
-    selected_lines = df1['Road_traffic_density'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-
-    selected_lines = df1['City'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-
-    selected_lines = df1['Festival'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-
-    selected_lines = df1['multiple_deliveries'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
-
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
-
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
-
-    # First, we need to reset the index of the dataset, because the NaN lines exclusion.
-    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
-
-    # Cleaning Time_taken
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
-
-    # Cleaning Weatherconditions:
-    df1['Weatherconditions'] = df1['Weatherconditions'].apply(lambda x: x.split('conditions ')[1])
-
-    return df1
-
-
-# =============================
-# Code Logic
-# =============================
-# Import dataset:
-df = pd.read_csv('dataset/train.csv')
-df1 = clean_code(df)
-
+# Stages of this run of the page are timed from here, see curry_company.instrumentation.
+render = instrumentation.start_render('company')
 # =============================
 # Sidebar
 # =============================
@@ -182,11 +24,13 @@ st.sidebar.markdown("## Fastest Delivery in Town")
 st.sidebar.markdown("""---""")
 
 st.sidebar.markdown("## Select a date:")
-date_slider = st.sidebar.slider('What is the cutoff date you wish to consider?',
-                                value=datetime.datetime(2022, 4, 13),
-                                min_value=datetime.datetime(2022, 2, 11),
-                                max_value=datetime.datetime(2022, 4, 6),
-                                format='DD-MM-YYYY')
+# The bounds come from the data, the range is selected by binary search over the orders sorted by date.
+first_date, last_date = dataset_dates()
+date_start, date_end = st.sidebar.slider('What is the date range you wish to consider?',
+                                         value=(first_date, last_date),
+                                         min_value=first_date,
+                                         max_value=last_date,
+                                         format='DD-MM-YYYY')
 
 st.sidebar.markdown("""---""")
 traffic_options = st.sidebar.multiselect('Select traffic conditions: ',
@@ -202,54 +46,116 @@ st.sidebar.markdown("""---""")
 
 st.sidebar.markdown('#### Powered by DS Community')
 
-# Data selection
-selected_lines = df1['Order_Date'] < date_slider
-df1 = df1.loc[selected_lines, :]
-
-# Traffic selection
-selected_lines = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[selected_lines, :]
+# The slider dates are inclusive, the selection ends before the day after the last one.
+spec = filter_key(date_end + datetime.timedelta(days=1), traffic_options, weather_conditions, date_start=date_start)
 
-# Weather selection
-selected_lines = df1['Weatherconditions'].isin(weather_conditions)
-df1 = df1.loc[selected_lines, :]
+# Outputs of the date, traffic and weather selection: read from its pre-rendered snapshot when there is one, otherwise
+# computed from the filtered orders and cube cells and cached across sessions per dataset version and normalized filter
+# state, so going back to a previous selection is instant. The computations themselves live in curry_company.company.
+# Each output names the inputs it reads, and only those are selected: the cube charts never load the orders.
+results = ViewResults('company', spec)
 
 # =============================
 # Layout
 # =============================
-tab1, tab2, tab3 = st.tabs(['Manager View', 'Strategic View', 'Geographical View'])
-with tab1:
+# Streamlit runs the body of every st.tabs tab on each rerun, so the views are picked with a radio instead and only the
+# selected one is computed. The others are computed (and cached) when opened.
+active_view = st.radio('View:', ['Manager View', 'Strategic View', 'Trends View', 'Geographical View'],
+                       horizontal=True, label_visibility='collapsed', key='company_view')
+if active_view == 'Manager View':
+    # The charts of the view are independent, they are computed concurrently and then laid out in order.
+    outputs = results.get_all({
+        'order_metric': (lambda cube: company.order_metric(cube), ['cube']),
+        'orders_by_traffic': (lambda cube: company.orders_by_traffic(cube), ['cube']),
+        'orders_by_city_traffic': (lambda cube: company.orders_by_city_traffic(cube), ['cube']),
+    })
     with st.container():
         # Number of orders per day.
         st.markdown('### Daily Order Count')
-        fig = order_metric(df1)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = outputs['order_metric']
+        with instrumentation.stage('st.plotly_chart'):
+            st.plotly_chart(fig, use_container_width=True)
 
     with st.container():
         col1, col2 = st.columns(2)
         with col1:
             st.markdown('### Orders by Traffic Type')
-            fig = orders_by_traffic(df1)
-            st.plotly_chart(fig, use_container_width=True, )
+            fig = outputs['orders_by_traffic']
+            with instrumentation.stage('st.plotly_chart'):
+                st.plotly_chart(fig, use_container_width=True, )
 
         with col2:
             st.markdown('### Order Volume: City and Traffic Comparison')
-            fig = orders_by_city_traffic(df1)
-            st.plotly_chart(fig, use_container_width=True)
-
-with tab2:
+            fig = outputs['orders_by_city_traffic']
+            with instrumentation.stage('st.plotly_chart'):
+                st.plotly_chart(fig, use_container_width=True)
+
+elif active_view == 'Strategic View':
+    outputs = results.get_all({
+        'orders_by_week': (lambda cube: company.orders_by_week(cube), ['cube']),
+        # The distinct drivers are counted per week, or estimated from the sketches in approximate mode.
+        'orders_by_week_person': (lambda cube, weekly_drivers=None, sketches=None: company.orders_by_week_person(
+            weekly_drivers, cube, sketches), ['cube', 'sketches'] if APPROXIMATE else ['cube', 'weekly_drivers']),
+    })
     with st.container():
         # Number of orders per week.
         st.markdown('### Weekly Order Summary')
-        fig = orders_by_week(df1)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = outputs['orders_by_week']
+        with instrumentation.stage('st.plotly_chart'):
+            st.plotly_chart(fig, use_container_width=True)
 
     with st.container():
         # Number of orders per delivery person per week.
         st.markdown('### Weekly Deliveries per Delivery Person')
-        fig = orders_by_week_person(df1)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = outputs['orders_by_week_person']
+        with instrumentation.stage('st.plotly_chart'):
+            st.plotly_chart(fig, use_container_width=True)
+
+elif active_view == 'Trends View':
+    outputs = results.get_all({
+        'rolling_orders': (lambda cube: company.rolling_orders(cube), ['cube']),
+        'rolling_delivery_time': (lambda cube: company.rolling_delivery_time(cube), ['cube']),
+        'week_over_week': (lambda cube: company.week_over_week(cube), ['cube']),
+        'delivery_time_percentiles': (lambda sketches: company.delivery_time_percentiles(sketches), ['sketches']),
+    })
+    with st.container():
+        # Moving counts smooth out the daily seasonality of the orders.
+        st.markdown('### Moving Order Count')
+        with instrumentation.stage('st.plotly_chart'):
+            st.plotly_chart(outputs['rolling_orders'], use_container_width=True)
+
+    with st.container():
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown('### Moving Delivery Time')
+            with instrumentation.stage('st.plotly_chart'):
+                st.plotly_chart(outputs['rolling_delivery_time'], use_container_width=True)
+
+        with col2:
+            st.markdown('### Week-over-Week Order Growth')
+            with instrumentation.stage('st.plotly_chart'):
+                st.plotly_chart(outputs['week_over_week'], use_container_width=True)
+
+    with st.container():
+        # Percentiles of the delivery time per day, e.g. how long the slowest 1% of the deliveries take.
+        st.markdown('### Delivery Time Percentiles')
+        with instrumentation.stage('st.plotly_chart'):
+            st.plotly_chart(outputs['delivery_time_percentiles'], use_container_width=True)
 
-with tab3:
+else:
     st.markdown('### City Traffic Distribution')
-    country_maps(df1)
+    map_mode = st.radio('Map view:', MAP_MODES, horizontal=True)
+    # In approximate mode the central locations are the medians of the sketches.
+    inputs = ['orders', 'sketches'] if APPROXIMATE and map_mode == 'Central locations' else ['orders']
+    html = results.get('map ' + map_mode,
+                       lambda orders, sketches=None: company.country_maps(orders, map_mode, sketches), inputs)
+    with instrumentation.stage('components.html'):
+        components.html(html, width=1024, height=610)
+
+
+# Timings of the run, shown in the sidebar when CURRY_COMPANY_DEBUG=1.
+render_stages = render.finish()
+if instrumentation.DEBUG_PANEL:
+    with st.sidebar.expander('Render timings'):
+        st.caption('{:.3f} s in total'.format(render.seconds))
+        st.dataframe(render_stages, hide_index=True)
@@ -1,83 +1,15 @@
 # Libraries:
-import pandas as pd
 import streamlit as st
 import datetime
 from PIL import Image
+from curry_company import dataset_dates, drivers, filter_key, instrumentation
+from curry_company.reports import ViewResults
+from curry_company.tables import paginate
 import matplotlib
 matplotlib.use('agg')
-
 st.set_page_config(page_title='Delivery Drivers Overview', page_icon='🛵', layout='wide')
-
-# =============================
-# Functions
-# =============================
-
-
-def top_delivers(df1, top_asc):
-    df2 = (df1.loc[:, ['Delivery_person_ID', 'City', 'Time_taken(min)']]
-           .rename(columns={'Time_taken(min)': 'Time Taken (min)', 'Delivery_person_ID': 'Delivery Person ID'})
-           .groupby(['City', 'Delivery Person ID'])
-           .mean()
-           .sort_values(['City', 'Time Taken (min)'], ascending=top_asc)
-           .reset_index())
-
-    df_aux01 = df2.loc[df2['City'] == 'Metropolitian', :].head(10)
-    df_aux02 = df2.loc[df2['City'] == 'Urban', :].head(10)
-    df_aux03 = df2.loc[df2['City'] == 'Semi-Urban', :].head(10)
-
-    df3 = pd.concat([df_aux01, df_aux02, df_aux03]).reset_index(drop=True)
-    return df3
-
-def clean_code(df1):
-    # Function to clean dataframe: removing "NaN", fixing data types, removing spaces within strings/text/object,
-    # formatting Data column, separating text from int column, remove 'condition' word
-    # Input: Dataframe and Output: Dataframe
-
-    selected_lines = df1['Delivery_person_Age'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
-
-    selected_lines = df1['Road_traffic_density'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-
-    selected_lines = df1['City'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-
-    selected_lines = df1['Festival'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-
-    selected_lines = df1['multiple_deliveries'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
-
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
-
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
-
-    # First, we need to reset the index of the dataset, because the NaN lines exclusion.
-    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
-
-    # Cleaning Time_taken
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
-
-    # Cleaning Weatherconditions:
-    df1['Weatherconditions'] = df1['Weatherconditions'].apply(lambda x: x.split('conditions ')[1])
-
-    return df1
-
-
-# =============================
-# Code Logic
-# =============================
-# Import dataset:
-df = pd.read_csv('dataset/train.csv')
-df1 = clean_code(df)
+# Stages of this run of the page are timed from here, see curry_company.instrumentation.
+render = instrumentation.start_render('drivers')
 
 # =============================
 # Sidebar
@@ -92,11 +24,13 @@ st.sidebar.markdown("## Fastest Delivery in Town")
 st.sidebar.markdown("""---""")
 
 st.sidebar.markdown("##### Select a date:")
-date_slider = st.sidebar.slider('What is the cutoff date you wish to consider?',
-                                value=datetime.datetime(2022, 4, 13),
-                                min_value=datetime.datetime(2022, 2, 11),
-                                max_value=datetime.datetime(2022, 4, 6),
-                                format='DD-MM-YYYY')
+# The bounds come from the data, the range is selected by binary search over the orders sorted by date.
+first_date, last_date = dataset_dates()
+date_start, date_end = st.sidebar.slider('What is the date range you wish to consider?',
+                                         value=(first_date, last_date),
+                                         min_value=first_date,
+                                         max_value=last_date,
+                                         format='DD-MM-YYYY')
 
 st.sidebar.markdown("""---""")
 st.sidebar.markdown("##### Select traffic conditions:")
@@ -112,17 +46,23 @@ weather_conditions = st.sidebar.multiselect('Select weather conditions: ',
 st.sidebar.markdown("""---""")
 st.sidebar.markdown('#### Powered by DS Community')
 
-# Data selection
-selected_lines = df1['Order_Date'] < date_slider
-df1 = df1.loc[selected_lines, :]
+# The slider dates are inclusive, the selection ends before the day after the last one.
+spec = filter_key(date_end + datetime.timedelta(days=1), traffic_options, weather_conditions, date_start=date_start)
 
-# Traffic selection
-selected_lines = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[selected_lines, :]
+# Outputs of the date, traffic and weather selection: read from its pre-rendered snapshot when there is one, otherwise
+# computed from the filtered cube and driver cells and cached across sessions per dataset version and normalized filter
+# state, so going back to a previous selection is instant. The computations themselves live in curry_company.drivers.
+results = ViewResults('drivers', spec)
 
-# Weather selection
-selected_lines = df1['Weatherconditions'].isin(weather_conditions)
-df1 = df1.loc[selected_lines, :]
+# The outputs of the page are independent, they are computed concurrently and then laid out in order.
+outputs = results.get_all({
+    'overall_metrics': (lambda cube: drivers.overall_metrics(cube), ['cube']),
+    'personnel_ratings': (lambda driver_cells: drivers.personnel_ratings(driver_cells), ['driver_cells']),
+    'ratings_by_traffic': (lambda cube: drivers.ratings_by(cube, 'Road_traffic_density', 'Road Traffic Density'),
+                           ['cube']),
+    'ratings_by_weather': (lambda cube: drivers.ratings_by(cube, 'Weatherconditions', 'Weather Condition'), ['cube']),
+    'top_delivers': (lambda driver_cells: drivers.top_delivers(driver_cells, k=10), ['driver_cells']),
+})
 
 # =============================
 # Layout
@@ -132,17 +72,18 @@ tab1 = st.tabs(['Manager View'])
 with st.container():
     st.title('Overall Performance Metrics')
     col1, col2, col3, col4 = st.columns(4, gap='large')
+    overall = outputs['overall_metrics']
     with col1:
-        oldest = df1.loc[:, 'Delivery_person_Age'].max()
+        oldest = overall['oldest']
         col1.metric('Oldest:', oldest)
     with col2:
-        youngest = df1.loc[:, 'Delivery_person_Age'].min()
+        youngest = overall['youngest']
         col2.metric('Youngest:', oldest)
     with col3:
-        best_vehicle = df1.loc[:, 'Vehicle_condition'].max()
+        best_vehicle = overall['best_vehicle']
         col3.metric('Best Vehicle:', best_vehicle)
     with col4:
-        worst_vehicle = df1.loc[:, 'Vehicle_condition'].min()
+        worst_vehicle = overall['worst_vehicle']
         col4.metric('Worst vehicle:', worst_vehicle)
 
 with st.container():
@@ -152,38 +93,37 @@ with st.container():
     col1, col2 = st.columns(2)
     with col1:
         st.markdown('##### Average Delivery Drivers Rating')
-        personnel_ratings = (df1.loc[:, ['Delivery_person_ID', 'Delivery_person_Ratings']]
-                             .groupby('Delivery_person_ID')
-                             .mean()
-                             .reset_index()
-                             .round(2))
-        personnel_ratings.columns = ['Delivery Person ID', 'Average Rating']
-
-        st.dataframe(personnel_ratings, hide_index=True, height=500)
+        ratings = outputs['personnel_ratings']
+
+        # Searching, sorting and paging happen here, only the rows of the current page are sent to the browser.
+        search = st.text_input('Search by Delivery Person ID:')
+        sort_col, order_col, size_col = st.columns(3)
+        sort_by = sort_col.selectbox('Sort by:', ['Delivery Person ID', 'Average Rating'])
+        order = order_col.selectbox('Order:', ['Ascending', 'Descending'])
+        page_size = size_col.selectbox('Rows per page:', [20, 50, 100])
+        page = st.number_input('Page:', min_value=1, value=1, step=1)
+
+        page_rows, total, pages = paginate(ratings, page=page, page_size=page_size, sort_by=sort_by,
+                                           ascending=order == 'Ascending', search=search,
+                                           search_column='Delivery Person ID')
+        with instrumentation.stage('st.dataframe', rows_in=len(page_rows)):
+            st.dataframe(page_rows, hide_index=True)
+        st.caption('Page {} of {} ({} delivery drivers)'.format(min(page, pages), pages, total))
     with col2:
         st.markdown('##### Average & Standard Deviation Ratings by Traffic Type')
-        avg_std = (df1.loc[:, ['Delivery_person_Ratings', 'Road_traffic_density']]
-                   .rename(columns={'Road_traffic_density': 'Road Traffic Density'})
-                   .groupby('Road Traffic Density')
-                   .agg({'Delivery_person_Ratings': ['mean', 'std']})
-                   .round(2))
-        avg_std.columns = ['Average', 'Standard Deviation']
+        avg_std = outputs['ratings_by_traffic']
         avg_std = avg_std.reset_index()
         avg_std_styled = avg_std.style.background_gradient(cmap='Blues').format(
             {'Average': '{:.2f}', 'Standard Deviation': '{:.2f}'})
-        st.dataframe(avg_std_styled, hide_index=True)
+        with instrumentation.stage('st.dataframe', rows_in=len(avg_std_styled.data)):
+            st.dataframe(avg_std_styled, hide_index=True)
 
         st.markdown('##### Average & Standard Deviation Ratings by Weather Conditions')
-        avg_std = (df1.loc[:, ['Delivery_person_Ratings', 'Weatherconditions']]
-                   .rename(columns={'Weatherconditions': 'Weather Condition'})
-                   .groupby('Weather Condition')
-                   .agg({'Delivery_person_Ratings': ['mean', 'std']})
-                   .round(2))
-        avg_std.columns = ['Average', 'Standard Deviation']
-        avg_std.reset_index()
+        avg_std = outputs['ratings_by_weather']
         avg_std_styled = avg_std.style.background_gradient(cmap='Blues').format(
             {'Average': '{:.2f}', 'Standard Deviation': '{:.2f}'})
-        st.dataframe(avg_std_styled)
+        with instrumentation.stage('st.dataframe', rows_in=len(avg_std_styled.data)):
+            st.dataframe(avg_std_styled)
 
 
 with st.container():
@@ -191,13 +131,20 @@ with st.container():
     st.title("Delivery Speed Analysis")
 
     col1, col2 = st.columns(2)
+    fastest, slowest = outputs['top_delivers']
     with col1:
         st.markdown('##### Top 10 Fastest Delivery Drivers by City')
-        df3 = top_delivers(df1, top_asc=True)
-        st.dataframe(df3, hide_index=True)
+        with instrumentation.stage('st.dataframe', rows_in=len(fastest)):
+            st.dataframe(fastest, hide_index=True)
     with col2:
         st.markdown('##### Top 10 Slowest Delivery Drivers by City')
-        df3 = top_delivers(df1, top_asc=False)
-        st.dataframe(df3, hide_index=True)
+        with instrumentation.stage('st.dataframe', rows_in=len(slowest)):
+            st.dataframe(slowest, hide_index=True)
 
 
+# Timings of the run, shown in the sidebar when CURRY_COMPANY_DEBUG=1.
+render_stages = render.finish()
+if instrumentation.DEBUG_PANEL:
+    with st.sidebar.expander('Render timings'):
+        st.caption('{:.3f} s in total'.format(render.seconds))
+        st.dataframe(render_stages, hide_index=True)
@@ -1,148 +1,19 @@
 # Libraries:
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
 import streamlit as st
 import datetime
 import folium
 from streamlit_folium import folium_static
 from PIL import Image
-from haversine import haversine
-import numpy as np
+from curry_company import dataset_dates, filter_key, instrumentation, restaurants
+from curry_company.reports import ViewResults
+from curry_company.sketches import APPROXIMATE
 import matplotlib
 matplotlib.use('agg')
 st.set_page_config(page_title="Restaurant's Overview", page_icon='🍽️', layout='wide')
+# Stages of this run of the page are timed from here, see curry_company.instrumentation.
+render = instrumentation.start_render('restaurants')
 
 
-# =============================
-# Functions
-# =============================
-
-
-def avg_std_time_on_traffic(df1):
-    cols = ['City', 'Time_taken(min)', 'Road_traffic_density']
-    df_aux = (df1.loc[:, cols]
-              .groupby(['City', 'Road_traffic_density'])
-              .agg({'Time_taken(min)': ['mean', 'std']}))
-    df_aux.columns = ['avg_time', 'std_time']
-    df_aux = df_aux.reset_index()
-    fig = px.sunburst(df_aux, path=['City', 'Road_traffic_density'], values='avg_time', color='std_time',
-                      color_continuous_scale='RdBu', color_continuous_midpoint=np.average(df_aux['std_time']))
-    return fig
-
-
-def avg_std_time_chart(df1):
-    cols = ['City', 'Time_taken(min)']
-    df_aux = df1.loc[:, cols].groupby('City').agg({'Time_taken(min)': ['mean', 'std']}).round(0)
-    df_aux.columns = ['avg_time', 'std_time']
-    df_aux = df_aux.reset_index()
-    fig = go.Figure()
-    fig.add_trace(go.Bar(name='Control', x=df_aux['City'], y=df_aux['avg_time'],
-                         error_y=dict(type='data', array=df_aux['std_time']),
-                         marker_color='lightblue'))
-    fig.update_traces(text=df_aux['avg_time'], textposition='auto', textfont=dict(size=14))
-    fig.update_layout(barmode='group')
-    return fig
-
-
-def avg_std_time_delivery(df1, op, festival):
-    """
-        This function calculates the mean time and standard deviation for delivery time.
-
-        Parameters:
-            df (DataFrame): The dataframe containing the necessary data for the calculation.
-            op (str): The type of operation, either 'avg_time' or 'std_time'.
-            festival (str): 'Yes' or 'No'
-        Returns:
-            DataFrame: A dataframe with two columns and one row, containing the calculated results.
-    """
-
-    df_aux = (df1.loc[:, ['Time_taken(min)', 'Festival']]
-              .groupby('Festival')
-              .agg({'Time_taken(min)': ['mean', 'std']}))
-
-    df_aux.columns = ['avg_time', 'std_time']
-    df_aux = df_aux.reset_index()
-    df_aux = np.round(df_aux.loc[df_aux['Festival'] == festival, op], 2)
-    return df_aux
-
-
-def distance(df1, fig):
-    if not fig:
-        cols = ['Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude',
-                'Delivery_location_longitude']
-
-        df1['distance'] = df1.loc[:, cols].apply(lambda x:
-                                                 haversine((x['Restaurant_latitude'], x['Restaurant_longitude']),
-                                                           (x['Delivery_location_latitude'],
-                                                            x['Delivery_location_longitude'])), axis=1)
-        avg = np.round(df1['distance'].mean(), 2)
-
-        return avg
-    else:
-        cols = ['Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude',
-                'Delivery_location_longitude']
-
-        df1['distance'] = df1.loc[:, cols].apply(lambda x:
-                                                 haversine((x['Restaurant_latitude'], x['Restaurant_longitude']),
-                                                           (x['Delivery_location_latitude'],
-                                                            x['Delivery_location_longitude'])), axis=1)
-        avg = df1.loc[:, ['City', 'distance']].groupby('City').mean().reset_index().round(0)
-        fig = go.Figure(data=[go.Pie(labels=avg['City'], values=avg['distance'], pull=[0, 0.1, 0])])
-        return fig
-
-
-def clean_code(df1):
-    # Function to clean dataframe: removing "NaN", fixing data types, removing spaces within strings/text/object,
-    # formatting Data column, separating text from int column, remove 'condition' word
-    # Input: Dataframe and Output: Dataframe
-
-    selected_lines = df1['Delivery_person_Age'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
-
-    selected_lines = df1['Road_traffic_density'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-
-    selected_lines = df1['City'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-
-    selected_lines = df1['Festival'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-
-    selected_lines = df1['multiple_deliveries'] != 'NaN '
-    df1 = df1.loc[selected_lines, :].copy()
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
-
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
-
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
-
-    # First, we need to reset the index of the dataset, because the NaN lines exclusion.
-    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
-
-    # Cleaning Time_taken
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
-
-    # Cleaning Weatherconditions:
-    df1['Weatherconditions'] = df1['Weatherconditions'].apply(lambda x: x.split('conditions ')[1])
-
-    return df1
-
-
-# =============================
-# Code Logic
-# =============================
-# Import dataset:
-df = pd.read_csv('dataset/train.csv')
-df1 = clean_code(df)
-
 # =============================
 # Sidebar
 # =============================
@@ -156,11 +27,13 @@ st.sidebar.markdown("## Fastest Delivery in Town")
 st.sidebar.markdown("""---""")
 
 st.sidebar.markdown("##### Select a date:")
-date_slider = st.sidebar.slider('What is the cutoff date you wish to consider?',
-                                value=datetime.datetime(2022, 4, 13),
-                                min_value=datetime.datetime(2022, 2, 11),
-                                max_value=datetime.datetime(2022, 4, 6),
-                                format='DD-MM-YYYY')
+# The bounds come from the data, the range is selected by binary search over the orders sorted by date.
+first_date, last_date = dataset_dates()
+date_start, date_end = st.sidebar.slider('What is the date range you wish to consider?',
+                                         value=(first_date, last_date),
+                                         min_value=first_date,
+                                         max_value=last_date,
+                                         format='DD-MM-YYYY')
 
 st.sidebar.markdown("""---""")
 st.sidebar.markdown("##### Select traffic conditions:")
@@ -176,17 +49,33 @@ weather_conditions = st.sidebar.multiselect('Select weather conditions: ',
 st.sidebar.markdown("""---""")
 st.sidebar.markdown('#### Powered by DS Community')
 
-# Data selection
-selected_lines = df1['Order_Date'] < date_slider
-df1 = df1.loc[selected_lines, :]
+# The slider dates are inclusive, the selection ends before the day after the last one.
+spec = filter_key(date_end + datetime.timedelta(days=1), traffic_options, weather_conditions, date_start=date_start)
+
+# Outputs of the date, traffic and weather selection: read from its pre-rendered snapshot when there is one, otherwise
+# computed from the filtered cube and driver cells and cached across sessions per dataset version and normalized filter
+# state, so going back to a previous selection is instant. The computations live in curry_company.restaurants.
+results = ViewResults('restaurants', spec)
+
 
-# Traffic selection
-selected_lines = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[selected_lines, :]
+def metrics():
+    # Every statistic of the view, computed in one pass over the cube when an output is not pre-rendered.
+    return results.get('view_metrics', lambda cube: restaurants.view_metrics(cube), ['cube'])
 
-# Weather selection
-selected_lines = df1['Weatherconditions'].isin(weather_conditions)
-df1 = df1.loc[selected_lines, :]
+
+# The outputs of the page are independent, they are computed concurrently and then laid out in order.
+outputs = results.get_all({
+    # Outputs of the statistics read no input themselves, the statistics are selected from the cube once.
+    'festival_times': (lambda: restaurants.festival_times(metrics()), []),
+    # The distinct drivers are counted over the driver cells, or estimated from the sketches in approximate mode.
+    'delivery_drivers': (lambda driver_cells=None, sketches=None: restaurants.delivery_drivers(driver_cells, sketches),
+                         ['sketches'] if APPROXIMATE else ['driver_cells']),
+    'avg_distance': (lambda: restaurants.distance(metrics(), fig=False), []),
+    'avg_std_time_chart': (lambda: restaurants.avg_std_time_chart(metrics()), []),
+    'avg_std_time_by_city_order': (lambda: restaurants.avg_std_time_by_city_order(metrics()), []),
+    'distance': (lambda: restaurants.distance(metrics(), fig=True), []),
+    'avg_std_time_on_traffic': (lambda: restaurants.avg_std_time_on_traffic(metrics()), []),
+})
 
 # =============================
 # Layout
@@ -195,23 +84,24 @@ tab1= st.tabs(['Manager View'])
 
 with st.container():
     st.title('Overall Restaurants Metrics')
+    festival_times = outputs['festival_times']
     col1, col2, col3 = st.columns(3, gap='large')
     with col1:
-        delivery_unique = len(df1.loc[:, 'Delivery_person_ID'].unique())
+        delivery_unique = outputs['delivery_drivers']
         col1.metric('Number of Delivery drivers', delivery_unique)
-        avg = distance(df1, fig=False)
+        avg = outputs['avg_distance']
         st.metric('Avg distance between restaurants and delivery locations:', avg)
 
     with col2:
-        df_aux = avg_std_time_delivery(df1, 'avg_time', festival='Yes')
+        df_aux = festival_times['avg_time_festival']
         col2.metric('Avg delivery time with Festival:', df_aux)
-        df_aux = avg_std_time_delivery(df1, 'std_time', festival='Yes')
+        df_aux = festival_times['std_time_festival']
         st.metric('Standard deviation time with Festival:', df_aux)
 
     with col3:
-        df_aux = avg_std_time_delivery(df1, 'avg_time', festival='No')
+        df_aux = festival_times['avg_time_no_festival']
         col3.metric('Average delivery time without Festival:', df_aux)
-        df_aux = avg_std_time_delivery(df1, 'std_time', festival='No')
+        df_aux = festival_times['std_time_no_festival']
         st.metric('Standard deviation time without Festival:', df_aux)
 
 
@@ -221,25 +111,18 @@ with st.container():
     col1, col2 = st.columns(2, gap='large')
     with col1:
         st.title("Average delivery time (min) by city")
-        fig = avg_std_time_chart(df1)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = outputs['avg_std_time_chart']
+        with instrumentation.stage('st.plotly_chart'):
+            st.plotly_chart(fig, use_container_width=True)
 
     with col2:
         st.title("Average and standard deviation of delivery times (min) by city and type of order")
-        cols = ['City', 'Time_taken(min)', 'Type_of_order']
-        df_aux = (df1.loc[:, cols]
-                  .rename(columns={'Type_of_order': 'Type of Order'})
-                  .groupby(['City', 'Type of Order'])
-                  .agg({'Time_taken(min)': ['mean', 'std']})
-                  .round(2))
-
-        df_aux.columns = ['Avg Time', 'Std Time']
-
-        df_aux = df_aux.reset_index()
+        df_aux = outputs['avg_std_time_by_city_order']
         df_aux_styled = df_aux.style.background_gradient(cmap='Blues').format(
             {'Avg Time': '{:.2f}', 'Std Time': '{:.2f}'})
 
-        st.dataframe(df_aux_styled, hide_index=True)
+        with instrumentation.stage('st.dataframe', rows_in=len(df_aux_styled.data)):
+            st.dataframe(df_aux_styled, hide_index=True)
 with st.container():
     st.markdown("""___""")
     st.title("Delivery Speed Analysis")
@@ -248,10 +131,20 @@ with st.container():
     with col1:
         st.markdown(
             'When considering the average of all the delivery distances from various cities together, the portion corresponding to each city is:')
-        fig = distance(df1, fig=True)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = outputs['distance']
+        with instrumentation.stage('st.plotly_chart'):
+            st.plotly_chart(fig, use_container_width=True)
 
     with col2:
         st.markdown('Sunburst chart (compass rose) to visualize the average and standard deviation of delivery time in different cities and traffic densities:')
-        fig = avg_std_time_on_traffic(df1)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = outputs['avg_std_time_on_traffic']
+        with instrumentation.stage('st.plotly_chart'):
+            st.plotly_chart(fig, use_container_width=True)
+
+
+# Timings of the run, shown in the sidebar when CURRY_COMPANY_DEBUG=1.
+render_stages = render.finish()
+if instrumentation.DEBUG_PANEL:
+    with st.sidebar.expander('Render timings'):
+        st.caption('{:.3f} s in total'.format(render.seconds))
+        st.dataframe(render_stages, hide_index=True)
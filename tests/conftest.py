@@ -0,0 +1,47 @@
+# Libraries:
+import pytest
+
+from curry_company.cleaning import clean_code
+from curry_company.filters import filter_key
+from curry_company.synthetic import WEATHER, generate_orders
+
+# Synthetic orders shared by the tests: their dates run from 2022-02-11 to 2022-04-06 (see curry_company.synthetic).
+ROWS = 3000
+
+# Selections checked by the tests: every order, whole weeks (Sunday to Sunday) of every traffic density and weather
+# condition, and a date range and traffic and weather options cutting through the driver tables.
+TRAFFIC = ['Low', 'Medium', 'High', 'Jam']
+SPECS = {
+    'every order': filter_key('2022-04-07', TRAFFIC, WEATHER, date_start='2022-02-11'),
+    'whole weeks': filter_key('2022-03-20', TRAFFIC, WEATHER, date_start='2022-02-20'),
+    'filtered': filter_key('2022-03-17', ['Low', 'Jam', 'High'], WEATHER[:4], date_start='2022-02-23'),
+}
+
+
+@pytest.fixture(scope='session')
+def raw_orders():
+    return generate_orders(ROWS, seed=1)
+
+
+@pytest.fixture(scope='session')
+def dataset(raw_orders, tmp_path_factory):
+    # Path of a dataset CSV of the synthetic orders, in a directory of its own (the caches are written next to it).
+    path = tmp_path_factory.mktemp('dataset') / 'train.csv'
+    raw_orders.to_csv(path, index=False)
+    return str(path)
+
+
+def select_orders(raw_orders, spec):
+    # Baseline selection: the cleaned orders of a selection, with plain pandas masks.
+    df1 = clean_code(raw_orders)
+    dates = df1['Order_Date']
+    selected = ((dates >= spec.date_start) & (dates < spec.date_cutoff)
+                & df1['Road_traffic_density'].isin(spec.traffic_options)
+                & df1['Weatherconditions'].isin(spec.weather_conditions))
+    return df1.loc[selected, :]
+
+
+def sort_cells(cells, dimensions):
+    # Cells in a canonical order, e.g. to compare cells of two backends: categories as text, missing values last.
+    cells = cells.astype({col: str for col in dimensions if col != 'Order_Date'})
+    return cells.sort_values(dimensions).reset_index(drop=True)
@@ -0,0 +1,74 @@
+# Libraries:
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SPECS
+from curry_company import loader
+from curry_company.driver_tables import DRIVER_DIMENSIONS, WEEK_DIMENSIONS
+from curry_company.ingest import ingest_batch
+from curry_company.reports import compute_report
+
+# Orders of the synthetic dataset written to the CSV, the others are ingested as a batch.
+STORED = 2000
+
+
+@pytest.fixture(scope='module')
+def ingested(raw_orders, tmp_path_factory):
+    # A dataset loaded before and extended after a batch is ingested, and a dataset of the same orders in one CSV.
+    path = tmp_path_factory.mktemp('ingested') / 'train.csv'
+    raw_orders.iloc[:STORED].to_csv(path, index=False)
+    path = str(path)
+    loader.load_dataset(path, ['Order_Date', 'City'])
+    loader.load_cube(path)
+    loader.load_driver_tables(path)
+    loader.load_sketches(path)
+    ingest_batch(raw_orders.iloc[STORED:], path)
+
+    rebuilt = tmp_path_factory.mktemp('rebuilt') / 'train.csv'
+    raw_orders.to_csv(rebuilt, index=False)
+    return path, str(rebuilt)
+
+
+def test_dataset(ingested):
+    path, rebuilt = ingested
+    columns = ['Order_Date', 'City', 'Delivery_person_ID', 'Time_taken(min)']
+    pd.testing.assert_frame_equal(loader.load_dataset(path, columns), loader.load_dataset(rebuilt, columns),
+                                  check_categorical=False)
+
+
+def test_cube(ingested):
+    path, rebuilt = ingested
+    pd.testing.assert_frame_equal(loader.load_cube(path), loader.load_cube(rebuilt), check_categorical=False)
+
+
+def test_driver_tables(ingested):
+    path, rebuilt = ingested
+    extended, expected = loader.load_driver_tables(path), loader.load_driver_tables(rebuilt)
+    pd.testing.assert_frame_equal(extended.drivers.sort_values(DRIVER_DIMENSIONS, ignore_index=True),
+                                  expected.drivers.sort_values(DRIVER_DIMENSIONS, ignore_index=True),
+                                  check_categorical=False)
+    pd.testing.assert_frame_equal(extended.weeks.sort_values(WEEK_DIMENSIONS, ignore_index=True),
+                                  expected.weeks.sort_values(WEEK_DIMENSIONS, ignore_index=True),
+                                  check_categorical=False)
+    assert (extended.first, extended.last) == (expected.first, expected.last)
+
+
+def test_sketches(ingested):
+    path, rebuilt = ingested
+    extended, expected = loader.load_sketches(path), loader.load_sketches(rebuilt)
+    pd.testing.assert_frame_equal(extended.cells, expected.cells, check_categorical=False)
+    np.testing.assert_array_equal(extended.registers, expected.registers)
+    np.testing.assert_array_equal(extended.times, expected.times)
+
+
+@pytest.mark.parametrize('view', ['drivers', 'restaurants'])
+def test_reports(ingested, view):
+    path, rebuilt = ingested
+    outputs, expected = compute_report(view, SPECS['filtered'], path), compute_report(view, SPECS['filtered'], rebuilt)
+    for name, value in expected.items():
+        if isinstance(value, pd.DataFrame):
+            pd.testing.assert_frame_equal(outputs[name], value, check_categorical=False)
+        elif isinstance(value, tuple):
+            for output, table in zip(outputs[name], value):
+                pd.testing.assert_frame_equal(output, table, check_categorical=False)
@@ -0,0 +1,52 @@
+# Libraries:
+import numpy as np
+import pytest
+
+from conftest import SPECS, select_orders
+from curry_company.cube import week_of_year
+from curry_company.reports import compute_report
+
+
+@pytest.mark.parametrize('name', SPECS)
+def test_drivers_view(dataset, raw_orders, name):
+    outputs = compute_report('drivers', SPECS[name], dataset)
+    df1 = select_orders(raw_orders, SPECS[name])
+
+    expected = df1.groupby('Delivery_person_ID', observed=True)['Delivery_person_Ratings'].mean()
+    ratings = outputs['personnel_ratings'].set_index('Delivery Person ID')['Average Rating']
+    # Compared with the exact means: sums added in another order may round a tie (e.g. 3.895) the other way.
+    assert sorted(ratings.index) == sorted(expected.index)
+    np.testing.assert_allclose(ratings, expected.reindex(ratings.index), rtol=0, atol=0.005 + 1e-9)
+
+    expected = df1.groupby('Road_traffic_density', observed=True)['Delivery_person_Ratings'].agg(['mean', 'std'])
+    ratings = outputs['ratings_by_traffic']
+    np.testing.assert_allclose(ratings['Average'], expected['mean'].reindex(ratings.index), rtol=0, atol=0.005 + 1e-9)
+    np.testing.assert_allclose(ratings['Standard Deviation'], expected['std'].reindex(ratings.index), rtol=0,
+                               atol=0.005 + 1e-9)
+
+    means = df1.groupby(['City', 'Delivery_person_ID'], observed=True)['Time_taken(min)'].mean()
+    fastest, slowest = outputs['top_delivers']
+    for city, times in means.groupby(level='City', observed=True):
+        assert (fastest.loc[fastest['City'] == city, 'Time Taken (min)'].tolist()
+                == times.sort_values().head(10).tolist())
+        assert (slowest.loc[slowest['City'] == city, 'Time Taken (min)'].tolist()
+                == times.sort_values(ascending=False).head(10).tolist())
+
+
+@pytest.mark.parametrize('name', SPECS)
+def test_weekly_drivers(dataset, raw_orders, name):
+    fig = compute_report('company', SPECS[name], dataset)['orders_by_week_person']
+    df1 = select_orders(raw_orders, SPECS[name])
+
+    weeks = df1.assign(week_of_year=week_of_year(df1['Order_Date'])).groupby('week_of_year')
+    expected = (weeks.size() / weeks['Delivery_person_ID'].nunique()).round(0)
+    assert list(fig.data[0].x) == expected.index.tolist()
+    assert list(fig.data[0].y) == expected.tolist()
+
+
+@pytest.mark.parametrize('name', SPECS)
+def test_delivery_drivers(dataset, raw_orders, name):
+    outputs = compute_report('restaurants', SPECS[name], dataset)
+    df1 = select_orders(raw_orders, SPECS[name])
+
+    assert outputs['delivery_drivers'] == df1['Delivery_person_ID'].nunique()
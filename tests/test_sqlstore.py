@@ -0,0 +1,53 @@
+# Libraries:
+import pandas as pd
+import pytest
+
+from conftest import SPECS, sort_cells
+from curry_company.cube import DIMENSIONS, MEASURES
+from curry_company.driver_tables import (COLUMNS as DRIVER_COLUMNS, DRIVER_DIMENSIONS, DRIVER_MEASURES,
+                                         build_driver_cells, build_week_cells, driver_cells, weekly_drivers)
+from curry_company.filters import filter_cube, filter_orders
+from curry_company.loader import load_cube, load_dataset, load_driver_tables
+from curry_company.sqlstore import query_cells, query_orders, query_weekly_drivers
+
+# The query backend (see curry_company.sqlstore) must select the same orders and cells as the pandas one, whatever
+# CURRY_COMPANY_BACKEND the tests run with: both are called directly.
+
+
+def _orders(path, spec, columns):
+    return filter_orders(load_dataset(path, columns), *spec)
+
+
+@pytest.mark.parametrize('name', SPECS)
+def test_orders(dataset, name):
+    columns = ['Order_Date', 'City', 'Road_traffic_density', 'Weatherconditions', 'Delivery_person_ID',
+               'Delivery_person_Ratings', 'Time_taken(min)', 'distance']
+    pd.testing.assert_frame_equal(query_orders(SPECS[name], columns, dataset), _orders(dataset, SPECS[name], columns),
+                                  check_categorical=False)
+
+
+@pytest.mark.parametrize('name', SPECS)
+def test_cube_cells(dataset, name):
+    expected = filter_cube(load_cube(dataset), *SPECS[name])
+    cells = query_cells(SPECS[name], DIMENSIONS, MEASURES, dataset)
+    pd.testing.assert_frame_equal(sort_cells(cells, DIMENSIONS), sort_cells(expected, DIMENSIONS), check_dtype=False)
+
+
+@pytest.mark.parametrize('name', SPECS)
+def test_driver_cells(dataset, name):
+    expected = build_driver_cells(_orders(dataset, SPECS[name], DRIVER_COLUMNS))
+    cells = query_cells(SPECS[name], DRIVER_DIMENSIONS, DRIVER_MEASURES, dataset)
+    pd.testing.assert_frame_equal(sort_cells(cells, DRIVER_DIMENSIONS), sort_cells(expected, DRIVER_DIMENSIONS),
+                                  check_dtype=False)
+    # The driver tables answer the selections of every traffic density and weather condition with the same cells.
+    tables = driver_cells(load_driver_tables(dataset), *SPECS[name])
+    assert (tables is None) == (name == 'filtered')
+    if tables is not None:
+        pd.testing.assert_frame_equal(sort_cells(tables, DRIVER_DIMENSIONS), sort_cells(expected, DRIVER_DIMENSIONS),
+                                      check_dtype=False)
+
+
+@pytest.mark.parametrize('name', SPECS)
+def test_weekly_drivers(dataset, name):
+    expected = weekly_drivers(build_week_cells(_orders(dataset, SPECS[name], DRIVER_COLUMNS)))
+    pd.testing.assert_frame_equal(query_weekly_drivers(SPECS[name], dataset), expected, check_dtype=False)